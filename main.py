@@ -9,10 +9,18 @@ import json
 import logging
 import asyncio
 from datetime import datetime, time, timedelta
-from typing import Any, Dict, List, Set
+from time import time as unix_time
+from typing import Any, Dict, List, Mapping, Set
 from collections import defaultdict, deque
+from contextlib import suppress
+from functools import lru_cache
+from types import MappingProxyType
+from dataclasses import dataclass
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor
 
-import pytz
+import orjson
+from cachetools import TTLCache
 from dotenv import load_dotenv
 from telegram import (
     Update, 
@@ -32,6 +40,7 @@ from telegram.ext import (
     JobQueue,
     filters
 )
+from telegram.error import RetryAfter
 
 # Load environment variables
 load_dotenv()
@@ -63,7 +72,66 @@ if DEV_USER_IDS_ENV:
 
 REGISTRATION_DAY = int(os.getenv('REGISTRATION_DAY', 2))  # Wednesday = 2
 REGISTRATION_TIME = os.getenv('REGISTRATION_TIME', '20:00')
-TIMEZONE = pytz.timezone('Europe/Moscow')  # Adjust to your university's timezone
+DATA_FLUSH_INTERVAL = int(os.getenv('DATA_FLUSH_INTERVAL', 5))  # Seconds between queue data / config flushes
+TIMEZONE = ZoneInfo('Europe/Moscow')  # Adjust to your university's timezone
+
+# Outgoing broadcast pacing: Telegram allows roughly 30 messages/second per bot
+MESSAGE_SEND_INTERVAL = 1 / 30
+
+# Abandoned conversations are dropped after this long, bounded to this many users
+USER_STATE_TTL = 1800
+USER_STATE_MAXSIZE = 10_000
+
+# Resolved display names are reused for this long; failed lookups are retried sooner
+DISPLAY_NAME_TTL = 300
+DISPLAY_NAME_MISS_TTL = 60
+DISPLAY_NAME_MAXSIZE = 50_000
+DISPLAY_NAME_FETCH_CONCURRENCY = 10  # Parallel get_chat calls when resolving a list of users
+GROUP_CHECK_CONCURRENCY = 20  # Parallel get_chat_member calls when checking every group
+LAST_EDIT_TTL = 3600  # Seconds the last render of a menu message is remembered for skipping no-op edits
+LAST_EDIT_MAXSIZE = 10_000
+CALLBACK_DEDUP_WINDOW = 0.5  # Seconds within which a repeat press of the same button is dropped
+
+_NO_IDS: frozenset[int] = frozenset()  # Shared empty default for admin-set lookups
+_NO_QUEUES: Mapping[str, list] = MappingProxyType({})  # Shared read-only default for group_queues lookups
+
+# Chat member statuses that mean the bot is still in a group ('left'/'kicked' mean it is not)
+_ACTIVE_MEMBER_STATUSES = frozenset({'member', 'administrator', 'creator'})
+
+# Text replies that abort a conversation, and the states of the /admin_add_course conversation
+_CANCEL_TOKENS = frozenset({'/cancel', 'cancel'})
+_ADD_COURSE_STATES = frozenset({'add_course_id', 'add_course_name', 'add_course_time'})
+
+# Weekday names indexed like datetime.weekday() (0 = Monday)
+DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+DAY_NAMES_SHORT = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+DAY_NAMES_RU = ('Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье')
+# Read-only fallback for courses without a stored schedule; store a copy, never this dict
+DEFAULT_SCHEDULE = {"day": 2, "time": "20:00"}
+COURSE_FORMS_RU = ('курс', 'курса', 'курсов')
+STUDENT_FORMS_RU = ('студент', 'студента', 'студентов')
+ENTRY_FORMS_RU = ('запись', 'записи', 'записей')
+# Course registration status labels, as returned by get_course_registration_status
+STATUS_OPEN_LABEL = "🟢 Open"
+STATUS_CLOSED_LABEL = "🔴 Closed"
+# Escapes user text for parse_mode='HTML' messages in one str.translate pass
+HTML_ESCAPE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+# Static message texts, built once instead of per event
+GROUP_WELCOME_MESSAGE = (
+    "👋 Привет! Я бот для записи на университетские курсы.\n\n"
+    "📝 **Как начать:**\n"
+    "1. Отправьте мне /start в личные сообщения\n"
+    "2. Выберите вашу группу из списка\n"
+    "3. Используйте /register в личных сообщениях для записи на курсы\n\n"
+    "🔒 **Важно:** Регистрация происходит только в личных сообщениях!\n\n"
+    "Используйте /list для просмотра доступных курсов."
+)
+GROUP_SELECTION_PROMPT = (
+    "📍 **Выберите вашу группу курса:**\n\n"
+    "Выберите группу, к которой вы хотите подключиться для записи на курсы.\n"
+    "💡 *После выбора группы вы сможете записаться на курсы в этой группе.*"
+)
 
 ACTIVITY_THRESHOLDS = {
     'register_entrypoint': {'limit': 5, 'window_seconds': 30, 'reason': 'register_entrypoint_burst'},
@@ -104,6 +172,104 @@ def audit_event(event: str, **fields: Any) -> None:
             parts.append(f"{key}={formatted}")
     audit_logger.info("audit %s", " ".join(parts))
 
+
+@lru_cache(maxsize=8192)
+def _format_registered_at(value: int | float | str, fmt: str) -> str:
+    """Format a queue entry's registered_at (Unix timestamp, or ISO string from older data files).
+
+    Memoized: entries keep their timestamp for life, so queue renders reuse the formatted text.
+    """
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, TIMEZONE).strftime(fmt)
+    return datetime.fromisoformat(value).strftime(fmt)
+
+
+def _plural_ru(count: int, forms: tuple[str, str, str]) -> str:
+    """Pick the Russian noun form for count from (one, few, many), e.g. ('курс', 'курса', 'курсов')."""
+    if count % 10 == 1 and count % 100 != 11:
+        return forms[0]
+    if 2 <= count % 10 <= 4 and not 12 <= count % 100 <= 14:
+        return forms[1]
+    return forms[2]
+
+
+def _parse_hhmm(text: str) -> time:
+    """Parse an 'HH:MM' schedule time without the strptime machinery; raises ValueError if malformed."""
+    hour, sep, minute = text.partition(':')
+    if not sep or not (0 < len(hour) <= 2 and 0 < len(minute) <= 2 and hour.isdigit() and minute.isdigit()):
+        raise ValueError(f"invalid HH:MM time: {text!r}")
+    return time(int(hour), int(minute))
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize state for disk with orjson (UTF-8, 2-space indent like the old json.dump output).
+
+    Int dict keys (group and user ids) are written as JSON strings, so state dicts need no str() copy.
+    """
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+
+def _write_atomic(path: str, payload: bytes) -> None:
+    """Write payload to a temp file and rename it over path so readers never see a partial file.
+
+    The temp file is fsynced before the rename and the directory after it, so a crash or power
+    loss leaves either the old or the new contents on disk, never an empty file.
+    """
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    _fsync_dir(path)
+
+
+def _fsync_dir(path: str) -> None:
+    """Flush the directory entry for path (POSIX only; Windows cannot open directories)"""
+    if os.name == 'nt':
+        return
+    dir_fd = os.open(os.path.dirname(path) or '.', os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def _read_bytes(path: str) -> bytes:
+    """Read a whole file as bytes"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@dataclass(slots=True)
+class QueueEntry:
+    """One registration in a course queue (serialized by orjson as a plain JSON object)"""
+    user_id: int
+    username: str
+    full_name: str
+    registered_at: int | str  # Unix timestamp; ISO string in entries from older data files
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'QueueEntry':
+        """Build an entry from its JSON form, ignoring fields that are no longer stored (e.g. position)"""
+        return cls(data['user_id'], data['username'], data['full_name'], data['registered_at'])
+
+
+@dataclass(slots=True)
+class GroupView:
+    """Display metadata for a group, cached by QueueManager.get_group_view"""
+    name: str
+    course_count: int
+
+
+@dataclass(slots=True)
+class UserState:
+    """Multi-step conversation state for a single user"""
+    state: str
+    data: dict
+    timestamp: datetime
+
+
 # Data storage (in production, use a proper database)
 class QueueManager:
     def __init__(self):
@@ -112,140 +278,188 @@ class QueueManager:
         
         # Group-aware data structures
         self.groups: Dict[int, Dict] = {}  # group_id -> group_info
-        self.group_queues: Dict[int, Dict[str, List[Dict]]] = defaultdict(lambda: defaultdict(list))  # group_id -> course_id -> queue
+        self._default_group_id: int | None = None  # First group, used by the backward-compat accessors
+        self.group_queues: Dict[int, Dict[str, List[QueueEntry]]] = {}  # group_id -> course_id -> queue (slots created by _ensure_queue_slots)
         self.group_registration_status: Dict[int, Dict[str, bool]] = defaultdict(dict)  # group_id -> course_id -> status
         self.group_courses: Dict[int, Dict] = defaultdict(dict)  # group_id -> course_id -> course_name
         self.group_schedules: Dict[int, Dict] = defaultdict(dict)  # group_id -> course_id -> schedule
         self.user_groups: Dict[int, int] = {}  # user_id -> associated_group_id (for private message context)
+        self._name_index: Dict[tuple[int, str], Set[str]] = defaultdict(set)  # (group_id, course_id) -> lowercased full names
+        self._user_index: Dict[tuple[int, str], Dict[int, List[QueueEntry]]] = defaultdict(dict)  # (group_id, course_id) -> user_id -> entries in queue order
         
         # Global admin configuration
         self.dev_users = []    # Global dev users (full access)
         self.group_admins = defaultdict(list)  # group_id -> [admin_user_ids]
         self.max_queue_size = 50  # Global default (fallback)
-        self.group_queue_sizes = defaultdict(lambda: 50)  # group_id -> queue_size
+        self.group_queue_sizes: Dict[int, int] = {}  # group_id -> queue_size (falls back to max_queue_size)
         self.blacklist = []  # List of user IDs that are blacklisted from registration
+        
+        # Set views of the lists above for O(1) permission checks (rebuilt by _rebuild_access_sets)
+        self._dev_set: frozenset[int] = frozenset()
+        self._admin_sets: Dict[int, frozenset[int]] = {}  # group_id (int; group_admins keeps JSON str keys) -> admin ids
+        self._admin_groups_by_user: Dict[int, tuple[int, ...]] = {}  # admin id -> group_ids they administer
+        self._blacklist_set: frozenset[int] = frozenset()
 
         # Auto-register flag (in-memory only, resets on restart)
         self.auto_register_enabled = False
         self.auto_register_user_id = None
         self.auto_register_username = None
 
+        # Single worker so queued writes hit the disk in the order they were requested
+        self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='queue-io')
+        self._last_queued: Dict[str, bytes] = {}  # path -> payload of the last write handed to the I/O thread
+        
+        # Every queue/config mutation goes through mark_data_dirty or save_config, which bump it;
+        # load_data_async uses it to detect changes made while it awaited the disk.
+        self._state_version = 0
+        
+        # Group names and course counts only change with config, so their cache follows save_config alone
+        self._config_version = 0
+        self._group_views: Dict[int, tuple[int, GroupView]] = {}
+        # course_id -> first group that has it, for legacy callbacks that carry no group id
+        self._course_groups: tuple[int, Dict[str, int]] | None = None
+        
+        # Deferred saves: while a flush job is running, mutations only mark data/config dirty
+        self.defer_saves = False
+        self._data_dirty = False
+        self._config_dirty = False
+
         # Load configuration first
         self.load_config()
+        self._rebuild_access_sets()
+        self._refresh_default_group()
         # Then load queue data
         self.load_data()
         
         # Migration from old single-group format
         self._migrate_legacy_data()
+        
+        self._ensure_queue_slots()
+        self._rebuild_name_index()
     
     def load_config(self):
-        """Load configuration from config.json with duplicate key detection"""
+        """Load configuration from config.json (check for duplicate keys with scripts/check_config_dupes.py)"""
         try:
-            # First, read the raw file content to detect duplicate keys
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                raw_content = f.read()
-                
-            # Check for duplicate keys in group_queue_sizes section
-            import re
-            if 'group_queue_sizes' in raw_content:
-                # Find the group_queue_sizes section
-                queue_sizes_match = re.search(r'"group_queue_sizes"\s*:\s*\{([^}]*)\}', raw_content)
-                if queue_sizes_match:
-                    queue_sizes_content = queue_sizes_match.group(1)
-                    # Find all keys in the group_queue_sizes section
-                    key_matches = re.findall(r'"(-?\d+)"\s*:', queue_sizes_content)
-                    unique_keys = set(key_matches)
-                    if len(key_matches) != len(unique_keys):
-                        logger.warning(f"Duplicate keys detected in group_queue_sizes: {key_matches}")
-                        logger.info("Will attempt to load and fix duplicate keys during save")
-            
-            # Now load the JSON normally
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                
-                # Load admin users and global settings
-                # Only load dev_users from config if no environment dev users are set
-                if not DEV_USER_IDS:
-                    self.dev_users = config.get('dev_users', [])      # Fallback to config-based dev users
-                else:
-                    self.dev_users = []  # Use environment-based dev users instead
-                    logger.info(f"Using {len(DEV_USER_IDS)} dev users from environment variables")
-                    
-                self.group_admins = defaultdict(list, config.get('group_admins', {}))  # Per-group admins
-                self.max_queue_size = config.get('max_queue_size', 50)  # Global default
-                
-                # Load blacklist
-                self.blacklist = config.get('blacklist', [])
-                logger.info(f"Loaded {len(self.blacklist)} blacklisted users")
-                
-                # Load group_queue_sizes with duplicate key handling
-                raw_group_queue_sizes = config.get('group_queue_sizes', {})
-                self.group_queue_sizes = defaultdict(lambda: 50)
-                for group_id, size in raw_group_queue_sizes.items():
-                    # Convert group_id to int for internal consistency
-                    try:
-                        int_group_id = int(group_id)
-                        self.group_queue_sizes[int_group_id] = size
-                        logger.debug(f"Loaded queue size for group {int_group_id}: {size}")
-                    except ValueError:
-                        logger.warning(f"Invalid group ID in group_queue_sizes: {group_id}")
-                
-                # Load groups configuration (new format)
-                groups_config = config.get('groups', {})
+            config = orjson.loads(self._read_file(self.config_file))
+            
+            # Load admin users and global settings
+            # Only load dev_users from config if no environment dev users are set
+            if not DEV_USER_IDS:
+                self.dev_users = config.get('dev_users', [])      # Fallback to config-based dev users
+            else:
+                self.dev_users = []  # Use environment-based dev users instead
+                logger.info(f"Using {len(DEV_USER_IDS)} dev users from environment variables")
                 
-                # Handle migration from old format
-                if not groups_config and 'courses' in config:
-                    # Old format: single group, migrate to new format
-                    logger.info("Migrating old config format to group-aware format...")
-                    default_group_id = -1001234567890  # Use a default group ID for migration
-                    groups_config[str(default_group_id)] = {
-                        'name': 'Default Group',
-                        'courses': config.get('courses', {})
+            self.group_admins = defaultdict(list, config.get('group_admins', {}))  # Per-group admins
+            self.max_queue_size = config.get('max_queue_size', 50)  # Global default
+            
+            # Load blacklist
+            self.blacklist = config.get('blacklist', [])
+            logger.info(f"Loaded {len(self.blacklist)} blacklisted users")
+            
+            # Load group_queue_sizes
+            raw_group_queue_sizes = config.get('group_queue_sizes', {})
+            self.group_queue_sizes = {}
+            for group_id, size in raw_group_queue_sizes.items():
+                # Convert group_id to int for internal consistency
+                try:
+                    int_group_id = int(group_id)
+                    self.group_queue_sizes[int_group_id] = size
+                    logger.debug(f"Loaded queue size for group {int_group_id}: {size}")
+                except ValueError:
+                    logger.warning(f"Invalid group ID in group_queue_sizes: {group_id}")
+            
+            # Load groups configuration (new format)
+            groups_config = config.get('groups', {})
+            
+            # Handle migration from old format
+            if not groups_config and 'courses' in config:
+                # Old format: single group, migrate to new format
+                logger.info("Migrating old config format to group-aware format...")
+                default_group_id = -1001234567890  # Use a default group ID for migration
+                groups_config[str(default_group_id)] = {
+                    'name': 'Default Group',
+                    'courses': config.get('courses', {})
+                }
+            
+            # Bring every course entry to the {'name', 'schedule'} form so the loop below needs no type checks
+            config_normalized = self._normalize_courses_config(groups_config)
+            
+            # Load group data
+            for group_id_str, group_data in groups_config.items():
+                try:
+                    group_id = int(group_id_str)
+                    self.groups[group_id] = {
+                        'name': group_data.get('name', f'Group {group_id}'),
+                        'created_at': group_data.get('created_at', datetime.now().isoformat())
                     }
-                
-                # Load group data
-                for group_id_str, group_data in groups_config.items():
-                    try:
-                        group_id = int(group_id_str)
-                        self.groups[group_id] = {
-                            'name': group_data.get('name', f'Group {group_id}'),
-                            'created_at': group_data.get('created_at', datetime.now().isoformat())
-                        }
+                    
+                    # Load courses for this group
+                    courses_config = group_data.get('courses', {})
+                    for course_id, course_data in courses_config.items():
+                        self.group_courses[group_id][course_id] = course_data['name']
+                        self.group_schedules[group_id][course_id] = course_data['schedule']
                         
-                        # Load courses for this group
-                        courses_config = group_data.get('courses', {})
-                        for course_id, course_data in courses_config.items():
-                            if isinstance(course_data, str):
-                                # Old format: course_data is just the name
-                                self.group_courses[group_id][course_id] = course_data
-                                self.group_schedules[group_id][course_id] = {"day": 2, "time": "20:00"}
-                            elif isinstance(course_data, dict):
-                                # New format: course_data has name and schedule
-                                self.group_courses[group_id][course_id] = course_data.get('name', course_id)
-                                self.group_schedules[group_id][course_id] = course_data.get('schedule', {"day": 2, "time": "20:00"})
-                            else:
-                                # Fallback
-                                self.group_courses[group_id][course_id] = str(course_data)
-                                self.group_schedules[group_id][course_id] = {"day": 2, "time": "20:00"}
-                            
-                            # Initialize registration as closed
-                            self.group_registration_status[group_id][course_id] = False
-                            
-                    except (ValueError, TypeError) as e:
-                        logger.error(f"Invalid group ID '{group_id_str}': {e}")
-                        continue
-                
-                # If no groups loaded, create default configuration
-                if not self.groups:
-                    logger.info("No groups found in config, creating default configuration")
-                    self._create_default_group_config()
-                
-                logger.info(f"Loaded config: {len(self.groups)} groups, {len(self.dev_users)} devs, {len(self.group_admins)} group admin entries")
-                
+                        # Initialize registration as closed
+                        self.group_registration_status[group_id][course_id] = False
+                        
+                except (ValueError, TypeError) as e:
+                    logger.error(f"Invalid group ID '{group_id_str}': {e}")
+                    continue
+            
+            # If no groups loaded, create default configuration
+            if not self.groups:
+                logger.info("No groups found in config, creating default configuration")
+                self._create_default_group_config()
+            elif config_normalized:
+                logger.info("Rewriting config.json with courses in the current format")
+                self.save_config()
+            
+            logger.info(f"Loaded config: {len(self.groups)} groups, {len(self.dev_users)} devs, {len(self.group_admins)} group admin entries")
+            
         except Exception as e:
             logger.error(f"Error loading config: {e}")
             self._create_default_group_config()
     
+    @staticmethod
+    def _normalize_courses_config(groups_config: Dict) -> bool:
+        """Rewrite old-style course entries (bare name strings, partial dicts) in place; True if any changed"""
+        changed = False
+        for group_data in groups_config.values():
+            courses_config = group_data.get('courses', {})
+            for course_id, course_data in courses_config.items():
+                if isinstance(course_data, dict) and 'name' in course_data and 'schedule' in course_data:
+                    continue
+                if isinstance(course_data, dict):
+                    # Partial new format: fill in what is missing
+                    name = course_data.get('name', course_id)
+                    schedule = course_data.get('schedule', dict(DEFAULT_SCHEDULE))
+                else:
+                    # Old format: course_data is just the name
+                    name = course_data if isinstance(course_data, str) else str(course_data)
+                    schedule = dict(DEFAULT_SCHEDULE)
+                courses_config[course_id] = {'name': name, 'schedule': schedule}
+                changed = True
+        return changed
+    
+    def _rebuild_access_sets(self):
+        """Rebuild the set views of dev users, group admins and blacklist after they change"""
+        self._dev_set = frozenset(DEV_USER_IDS) | frozenset(self.dev_users)
+        self._admin_sets = {}
+        admin_groups_by_user = defaultdict(list)
+        for group_key, admin_ids in self.group_admins.items():
+            try:
+                group_id = int(group_key)
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid group ID in group_admins: {group_key}")
+                continue
+            self._admin_sets[group_id] = frozenset(admin_ids)
+            for admin_id in self._admin_sets[group_id]:
+                admin_groups_by_user[admin_id].append(group_id)
+        # Reverse view: admin user_id -> the groups they administer, in config order
+        self._admin_groups_by_user = {user_id: tuple(group_ids) for user_id, group_ids in admin_groups_by_user.items()}
+        self._blacklist_set = frozenset(self.blacklist)
+    
     def _create_default_group_config(self):
         """Create default configuration for migration or first run"""
         default_group_id = -1001234567890  # Default group ID for single-group setups
@@ -263,45 +477,127 @@ class QueueManager:
         
         for course_id, course_name in default_courses.items():
             self.group_courses[default_group_id][course_id] = course_name
-            self.group_schedules[default_group_id][course_id] = {"day": 2, "time": "20:00"}
+            self.group_schedules[default_group_id][course_id] = dict(DEFAULT_SCHEDULE)
             self.group_registration_status[default_group_id][course_id] = False
     
     def save_data(self):
         """Save queue data to file"""
         try:
             data = {
-                'group_queues': {str(group_id): dict(queues) for group_id, queues in self.group_queues.items()},
-                'group_registration_status': {str(group_id): dict(status) for group_id, status in self.group_registration_status.items()},
-                'user_groups': {str(user_id): group_id for user_id, group_id in self.user_groups.items()},
-                'last_updated': datetime.now().isoformat(),
+                'group_queues': self.group_queues,
+                'group_registration_status': self.group_registration_status,
+                'user_groups': self.user_groups,
                 'format_version': '2.0'  # Mark as new format
             }
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            self._write_file(self.data_file, _dumps(data), _write_atomic)
         except Exception as e:
             logger.error(f"Error saving data: {e}")
     
+    def mark_data_dirty(self):
+        """Record that queue data changed; saved by the next flush, or right away if flushing is off"""
+        self._state_version += 1
+        if self.defer_saves:
+            self._data_dirty = True
+        else:
+            self.save_data()
+    
+    async def flush_pending(self):
+        """Write queue data and config if they changed since the last flush"""
+        if self._data_dirty:
+            self._data_dirty = False
+            self.save_data()
+        if self._config_dirty:
+            self._config_dirty = False
+            self._write_config()
+    
+    async def shutdown(self):
+        """Flush pending changes and wait for all queued writes to reach the disk"""
+        await self.flush_pending()
+        self._io_executor.shutdown(wait=True)
+    
+    def _write_file(self, path: str, payload: bytes, writer) -> None:
+        """Run writer(path, payload) on the I/O thread when the event loop is running, inline otherwise"""
+        # Writes run in submission order, so the last queued write is what the file will hold
+        if self._last_queued.get(path) == payload:
+            return
+        self._last_queued[path] = payload
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Startup/migration path: no event loop to block yet
+            try:
+                writer(path, payload)
+            except Exception:
+                self._forget_queued(path, payload)
+                raise
+            return
+        
+        future = loop.run_in_executor(self._io_executor, writer, path, payload)
+        future.add_done_callback(lambda fut: self._log_write_result(fut, path, payload))
+    
+    def _forget_queued(self, path: str, payload: bytes) -> None:
+        """Drop a failed write from _last_queued so the same state is written again next time"""
+        if self._last_queued.get(path) is payload:
+            del self._last_queued[path]
+    
+    def _read_file(self, path: str) -> bytes:
+        """Read a file on the I/O thread so the read sees every write queued before it"""
+        return self._io_executor.submit(_read_bytes, path).result()
+    
+    async def _read_file_async(self, path: str) -> bytes:
+        """Awaitable _read_file for handlers: the event loop keeps running while the I/O thread reads"""
+        return await asyncio.get_running_loop().run_in_executor(self._io_executor, _read_bytes, path)
+    
+    def _log_write_result(self, future: asyncio.Future, path: str, payload: bytes) -> None:
+        """Done-callback for background writes: surface failures in the log"""
+        if future.cancelled():
+            logger.warning(f"Write to {path} was cancelled")
+            self._forget_queued(path, payload)
+        elif future.exception() is not None:
+            logger.error(f"Error writing {path}: {future.exception()}")
+            self._forget_queued(path, payload)
+    
     def load_data(self):
         """Load queue data from file"""
         try:
             if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    data = json.load(f)
-                    
-                    # Check format version
-                    format_version = data.get('format_version', '1.0')
-                    
-                    if format_version == '2.0':
-                        # New group-aware format
-                        self._load_group_data(data)
-                    else:
-                        # Old format - will be handled by migration
-                        self._legacy_data = data
-                    
-                    logger.info(f"Loaded data format {format_version}")
+                self._apply_data(orjson.loads(self._read_file(self.data_file)))
+        except Exception as e:
+            logger.error(f"Error loading data: {e}")
+    
+    async def load_data_async(self):
+        """Load queue data from file without blocking the event loop"""
+        try:
+            version = self._state_version
+            raw = await self._read_file_async(self.data_file)
+            if self._state_version != version:
+                # A handler changed state while we waited; memory is newer than what we read
+                logger.info("Skipped queue data reload: state changed during the read")
+                return
+            self._apply_data(orjson.loads(raw))
+        except FileNotFoundError:
+            pass
         except Exception as e:
             logger.error(f"Error loading data: {e}")
     
+    def _apply_data(self, data):
+        """Replace in-memory queue state with data parsed from the data file"""
+        self._state_version += 1
+        # Check format version
+        format_version = data.get('format_version', '1.0')
+        
+        if format_version == '2.0':
+            # New group-aware format
+            self._load_group_data(data)
+            self._ensure_queue_slots()
+            self._rebuild_name_index()
+        else:
+            # Old format - will be handled by migration
+            self._legacy_data = data
+        
+        logger.info(f"Loaded data format {format_version}")
+    
     def _load_group_data(self, data):
         """Load data in new group-aware format"""
         # Load group queues
@@ -309,7 +605,10 @@ class QueueManager:
         for group_id_str, queues in group_queues_data.items():
             try:
                 group_id = int(group_id_str)
-                self.group_queues[group_id] = defaultdict(list, queues)
+                self.group_queues[group_id] = {
+                    course_id: [QueueEntry.from_dict(entry) for entry in queue]
+                    for course_id, queue in queues.items()
+                }
             except (ValueError, TypeError):
                 logger.error(f"Invalid group ID in queue data: {group_id_str}")
         
@@ -337,6 +636,39 @@ class QueueManager:
                 if course_id not in self.group_registration_status[group_id]:
                     self.group_registration_status[group_id][course_id] = False
     
+    def _ensure_queue_slots(self):
+        """Give every known group and course an (empty) queue so lookups never need defaults"""
+        for group_id in self.groups.keys() | self.group_courses.keys():
+            queues = self.group_queues.setdefault(group_id, {})
+            for course_id in self.group_courses.get(group_id, {}):
+                queues.setdefault(course_id, [])
+    
+    def _rebuild_name_index(self):
+        """Rebuild the duplicate-name and per-user indexes from every loaded queue"""
+        self._name_index = defaultdict(set)
+        self._user_index = defaultdict(dict)
+        for group_id, queues in self.group_queues.items():
+            for course_id in queues:
+                self._index_course_names(group_id, course_id)
+    
+    def _index_course_names(self, group_id: int, course_id: str):
+        """Rebuild the duplicate-name and per-user indexes for one course queue"""
+        queue = self.group_queues.get(group_id, _NO_QUEUES).get(course_id, ())
+        self._name_index[(group_id, course_id)] = {entry.full_name.lower() for entry in queue}
+        by_user: Dict[int, List[QueueEntry]] = {}
+        for entry in queue:
+            by_user.setdefault(entry.user_id, []).append(entry)
+        self._user_index[(group_id, course_id)] = by_user
+    
+    def _drop_course_index(self, group_id: int, course_id: str):
+        """Forget the indexes of a course queue that was cleared or removed"""
+        self._name_index.pop((group_id, course_id), None)
+        self._user_index.pop((group_id, course_id), None)
+    
+    def get_user_entries(self, group_id: int, course_id: str, user_id: int) -> List[QueueEntry]:
+        """Entries registered by user_id in a course queue, in queue order (do not mutate)"""
+        return self._user_index.get((group_id, course_id), {}).get(user_id, [])
+    
     def _migrate_legacy_data(self):
         """Migrate data from old single-group format to new group-aware format"""
         if not hasattr(self, '_legacy_data'):
@@ -346,13 +678,13 @@ class QueueManager:
         
         try:
             legacy_data = self._legacy_data
-            default_group_id = list(self.groups.keys())[0] if self.groups else -1001234567890
+            default_group_id = self._default_group_id if self._default_group_id is not None else -1001234567890
             
             # Migrate queues
             old_queues = legacy_data.get('queues', {})
             for course_id, queue in old_queues.items():
                 if course_id in self.group_courses.get(default_group_id, {}):
-                    self.group_queues[default_group_id][course_id] = queue
+                    self.group_queues.setdefault(default_group_id, {})[course_id] = [QueueEntry.from_dict(entry) for entry in queue]
             
             # Migrate registration status
             old_status = legacy_data.get('course_registration_status', {})
@@ -382,48 +714,42 @@ class QueueManager:
     @property 
     def courses(self):
         """Backward compatibility: return courses from default group"""
-        default_group = list(self.groups.keys())[0] if self.groups else None
-        if default_group:
-            return self.group_courses.get(default_group, {})
+        if self._default_group_id is not None:
+            return self.group_courses.get(self._default_group_id, {})
         return {}
     
     @property
     def course_schedules(self):
         """Backward compatibility: return schedules from default group"""
-        default_group = list(self.groups.keys())[0] if self.groups else None
-        if default_group:
-            return self.group_schedules.get(default_group, {})
+        if self._default_group_id is not None:
+            return self.group_schedules.get(self._default_group_id, {})
         return {}
     
     @property 
     def queues(self):
         """Backward compatibility: return queues from default group"""
-        default_group = list(self.groups.keys())[0] if self.groups else None
-        if default_group:
-            return self.group_queues.get(default_group, defaultdict(list))
-        return defaultdict(list)
+        if self._default_group_id is not None:
+            return self.group_queues.get(self._default_group_id, {})
+        return {}
     
     @property
     def course_registration_status(self):
         """Backward compatibility: return registration status from default group"""
-        default_group = list(self.groups.keys())[0] if self.groups else None
-        if default_group:
-            return self.group_registration_status.get(default_group, {})
+        if self._default_group_id is not None:
+            return self.group_registration_status.get(self._default_group_id, {})
         return {}
     
     # Backward compatibility methods for single-group operations
     def get_course_registration_status_compat(self, course_id: str) -> str:
         """Backward compatibility version"""
-        default_group = list(self.groups.keys())[0] if self.groups else None
-        if default_group:
-            return self.get_course_registration_status(default_group, course_id)
-        return "🔴 Closed"
+        if self._default_group_id is not None:
+            return self.get_course_registration_status(self._default_group_id, course_id)
+        return STATUS_CLOSED_LABEL
     
     def is_course_registration_open_compat(self, course_id: str) -> bool:
         """Backward compatibility version"""
-        default_group = list(self.groups.keys())[0] if self.groups else None
-        if default_group:
-            return self.is_course_registration_open(default_group, course_id)
+        if self._default_group_id is not None:
+            return self.is_course_registration_open(self._default_group_id, course_id)
         return False
     
     def get_user_group(self, user_id: int) -> int | None:
@@ -433,9 +759,13 @@ class QueueManager:
     def associate_user_with_group(self, user_id: int, group_id: int):
         """Associate a user with a group for private message context"""
         self.user_groups[user_id] = group_id
-        self.save_data()
+        self.mark_data_dirty()
         logger.info(f"Associated user {user_id} with group {group_id}")
     
+    def _refresh_default_group(self):
+        """Cache the first group id so the backward-compat accessors don't rebuild a key list each call"""
+        self._default_group_id = next(iter(self.groups), None)
+    
     def initialize_group(self, group_id: int, group_name: str = None):
         """Initialize a new group when bot is added to it"""
         if group_id in self.groups:
@@ -447,6 +777,7 @@ class QueueManager:
             'name': group_name or f'Group {group_id}',
             'created_at': datetime.now().isoformat()
         }
+        self._refresh_default_group()
         
         # Initialize with default courses
         default_courses = {
@@ -455,15 +786,16 @@ class QueueManager:
             'discrete': 'Дискретка'
         }
         
+        self.group_queues[group_id] = {}
         for course_id, course_name in default_courses.items():
             self.group_courses[group_id][course_id] = course_name
-            self.group_schedules[group_id][course_id] = {"day": 2, "time": "20:00"}
+            self.group_schedules[group_id][course_id] = dict(DEFAULT_SCHEDULE)
             self.group_registration_status[group_id][course_id] = False
             self.group_queues[group_id][course_id] = []
         
         # Save changes
         self.save_config()
-        self.save_data()
+        self.mark_data_dirty()
         
         logger.info(f"Initialized new group {group_id} ({group_name}) with {len(default_courses)} default courses")
     
@@ -490,7 +822,7 @@ class QueueManager:
         audit_event("register_attempt", **audit_fields)
 
         # Check if user is blacklisted
-        if user_id in self.blacklist:
+        if user_id in self._blacklist_set:
             audit_event("register_rejected_blacklist", **audit_fields)
             return False, "Sorry an error occured. Try again later.", "blacklisted"
         
@@ -511,17 +843,19 @@ class QueueManager:
             return False, "Invalid course selected!", "invalid_course"
         
         # Check if this name is already registered for this course in this group
-        for entry in self.group_queues[group_id][course_id]:
-            if entry['full_name'].lower() == full_name.lower():
-                registered_by = entry['username'] if entry['username'] != "Unknown" else f"User {entry['user_id']}"
-                course_name = self.group_courses[group_id][course_id]
-                audit_event(
-                    "register_rejected_duplicate_name",
-                    course_name=course_name,
-                    duplicate_owner=registered_by,
-                    **audit_fields,
-                )
-                return False, f"Имя '{full_name}' уже записано на {course_name} пользователем @{registered_by}!", "duplicate_name"
+        name_key = full_name.lower()
+        if name_key in self._name_index[(group_id, course_id)]:
+            # Only look up the existing entry to report who registered it
+            entry = next(e for e in self.group_queues[group_id][course_id] if e.full_name.lower() == name_key)
+            registered_by = entry.username if entry.username != "Unknown" else f"User {entry.user_id}"
+            course_name = self.group_courses[group_id][course_id]
+            audit_event(
+                "register_rejected_duplicate_name",
+                course_name=course_name,
+                duplicate_owner=registered_by,
+                **audit_fields,
+            )
+            return False, f"Имя '{full_name}' уже записано на {course_name} пользователем @{registered_by}!", "duplicate_name"
         
         # Check queue size limit
         max_size = self.get_group_queue_size(group_id)
@@ -529,27 +863,53 @@ class QueueManager:
             audit_event("register_rejected_queue_full", max_size=max_size, **audit_fields)
             return False, f"Очередь полная! Максимум {max_size} записей разрешено.", "queue_full"
         
-        # Add user to queue
-        entry = {
-            'user_id': user_id,
-            'username': user_name,
-            'full_name': full_name,
-            'registered_at': datetime.now(TIMEZONE).isoformat(),
-            'position': len(self.group_queues[group_id][course_id]) + 1
-        }
+        # Add user to queue (position is the 1-based list index, not stored)
+        entry = QueueEntry(user_id, user_name, full_name, int(unix_time()))
         
-        self.group_queues[group_id][course_id].append(entry)
-        self.save_data()
+        queue = self.group_queues[group_id][course_id]
+        queue.append(entry)
+        position = len(queue)
+        self._name_index[(group_id, course_id)].add(name_key)
+        self._user_index[(group_id, course_id)].setdefault(user_id, []).append(entry)
+        self.mark_data_dirty()
         
         course_name = self.group_courses[group_id][course_id]
         audit_event(
             "register_success",
             course_name=course_name,
-            position=entry['position'],
-            registered_at=entry['registered_at'],
+            position=position,
+            registered_at=datetime.fromtimestamp(entry.registered_at, TIMEZONE),
             **audit_fields,
         )
-        return True, f"Успешно записали '{full_name}' на {course_name}! Позиция: {entry['position']}", "success"
+        return True, f"Успешно записали '{full_name}' на {course_name}! Позиция: {position}", "success"
+    
+    @property
+    def state_version(self) -> int:
+        """Counter that moves on with every queue/config change; lets callers cache derived views"""
+        return self._state_version
+    
+    def get_group_view(self, group_id: int) -> GroupView:
+        """Group name and course count for menus, cached until the config next changes"""
+        cached = self._group_views.get(group_id)
+        if cached and cached[0] == self._config_version:
+            return cached[1]
+        
+        view = GroupView(
+            name=self.groups.get(group_id, {}).get('name', f'Group {group_id}'),
+            course_count=len(self.group_courses.get(group_id, {})),
+        )
+        self._group_views[group_id] = (self._config_version, view)
+        return view
+    
+    def find_course_group(self, course_id: str) -> int | None:
+        """Group that has course_id (the first in config order), indexed until the config next changes"""
+        if self._course_groups is None or self._course_groups[0] != self._config_version:
+            index = {}
+            for group_id, courses in self.group_courses.items():
+                for known_course_id in courses:
+                    index.setdefault(known_course_id, group_id)
+            self._course_groups = (self._config_version, index)
+        return self._course_groups[1].get(course_id)
     
     def get_queue_status(self, group_id: int, course_id: str = None) -> str:
         """Get queue status for a course or all courses in a specific group"""
@@ -569,7 +929,7 @@ class QueueManager:
             course_name = self.group_courses[group_id][course_id]
             status = f"📚 {course_name} ({len(queue)} registered):\n"
             for i, entry in enumerate(queue[:10], 1):  # Show top 10
-                status += f"{i}. {entry['full_name']} (@{entry['username']})\n"
+                status += f"{i}. {entry.full_name} (@{entry.username})\n"
             
             if len(queue) > 10:
                 status += f"... and {len(queue) - 10} more"
@@ -595,32 +955,77 @@ class QueueManager:
     def clear_queues(self, group_id: int):
         """Clear all queues for a specific group"""
         if group_id in self.groups:
-            self.group_queues[group_id].clear()
-            self.save_data()
+            queues = self.group_queues.setdefault(group_id, {})
+            for course_id in queues:
+                self._drop_course_index(group_id, course_id)
+                queues[course_id] = []
+            self.mark_data_dirty()
     
     def clear_course_queue(self, group_id: int, course_id: str):
         """Clear queue for a specific course in a specific group"""
         if group_id in self.groups and course_id in self.group_courses.get(group_id, {}):
             self.group_queues[group_id][course_id] = []
-            self.save_data()
+            self._drop_course_index(group_id, course_id)
+            self.mark_data_dirty()
+    
+    def remove_queue_entry(self, group_id: int, course_id: str, index: int) -> QueueEntry:
+        """Remove the entry at index from a course queue and return it"""
+        removed_entry = self.group_queues[group_id][course_id].pop(index)
+        self._unindex_entry(group_id, course_id, removed_entry)
+        self.mark_data_dirty()
+        return removed_entry
+    
+    def remove_user_entry(self, group_id: int, course_id: str, entry: QueueEntry) -> bool:
+        """Remove a specific entry (as returned by get_user_entries) from a course queue"""
+        queue = self.group_queues[group_id][course_id]
+        for i, queued in enumerate(queue):
+            if queued is entry:
+                del queue[i]
+                self._unindex_entry(group_id, course_id, entry)
+                self.mark_data_dirty()
+                return True
+        return False
+    
+    def _unindex_entry(self, group_id: int, course_id: str, entry: QueueEntry):
+        """Drop one removed entry from the name and per-user indexes instead of rebuilding them"""
+        key = (group_id, course_id)
+        # add_to_queue rejects duplicate names, so no other entry in this queue shares it
+        self._name_index[key].discard(entry.full_name.lower())
+        user_entries = self._user_index[key].get(entry.user_id)
+        if user_entries:
+            # Rebind rather than mutate: callers may still hold the list from get_user_entries
+            remaining = [e for e in user_entries if e is not entry]
+            if remaining:
+                self._user_index[key][entry.user_id] = remaining
+            else:
+                del self._user_index[key][entry.user_id]
+    
+    def swap_queue_entries(self, group_id: int, course_id: str, index1: int, index2: int):
+        """Swap two entries of a course queue by index"""
+        queue = self.group_queues[group_id][course_id]
+        queue[index1], queue[index2] = queue[index2], queue[index1]
+        if queue[index1].user_id == queue[index2].user_id:
+            # Same user on both sides: their indexed entries changed order
+            self._index_course_names(group_id, course_id)
+        self.mark_data_dirty()
     
     def open_course_registration(self, group_id: int, course_id: str):
         """Open registration for a specific course in a specific group"""
         if group_id in self.groups and course_id in self.group_courses.get(group_id, {}):
             self.group_registration_status[group_id][course_id] = True
-            self.save_data()
+            self.mark_data_dirty()
     
     def close_course_registration(self, group_id: int, course_id: str):
         """Close registration for a specific course in a specific group"""
         if group_id in self.groups and course_id in self.group_courses.get(group_id, {}):
             self.group_registration_status[group_id][course_id] = False
-            self.save_data()
+            self.mark_data_dirty()
     
     def set_course_registration_status(self, group_id: int, course_id: str, status: bool):
         """Set registration status for a specific course in a specific group"""
         if group_id in self.groups and course_id in self.group_courses.get(group_id, {}):
             self.group_registration_status[group_id][course_id] = status
-            self.save_data()
+            self.mark_data_dirty()
     
     def auto_register_if_enabled(self, group_id, course_id):
         """Auto-register 'ali' if the flag is on"""
@@ -648,21 +1053,21 @@ class QueueManager:
     def get_course_registration_status(self, group_id: int, course_id: str) -> str:
         """Get formatted registration status for a course in a specific group"""
         is_open = self.group_registration_status.get(group_id, {}).get(course_id, False)
-        return "🟢 Open" if is_open else "🔴 Closed"
+        return STATUS_OPEN_LABEL if is_open else STATUS_CLOSED_LABEL
     
     def open_registration(self, group_id: int):
         """Open registration for ALL courses in a specific group"""
         if group_id in self.groups:
             for course_id in self.group_courses.get(group_id, {}):
                 self.group_registration_status[group_id][course_id] = True
-            self.save_data()
+            self.mark_data_dirty()
     
     def close_registration(self, group_id: int):
         """Close registration for ALL courses in a specific group"""
         if group_id in self.groups:
             for course_id in self.group_courses.get(group_id, {}):
                 self.group_registration_status[group_id][course_id] = False
-            self.save_data()
+            self.mark_data_dirty()
     
     def get_group_courses(self, group_id: int) -> dict:
         """Get all courses for a specific group"""
@@ -672,6 +1077,39 @@ class QueueManager:
         """Get all course schedules for a specific group"""
         return self.group_schedules.get(group_id, {})
     
+    def get_group_course_statuses(self, group_id: int) -> dict:
+        """Get registration open/closed flags for every course in a specific group"""
+        return self.group_registration_status.get(group_id, {})
+    
+    def snapshot_group(self, group_id: int) -> list[tuple[str, str, dict, bool, int]]:
+        """Get (course_id, name, schedule, is_open, queue_len) for every course in a group"""
+        schedules = self.group_schedules.get(group_id, {})
+        statuses = self.group_registration_status.get(group_id, {})
+        queues = self.group_queues.get(group_id, _NO_QUEUES)
+        return [
+            (
+                course_id,
+                course_name,
+                schedules.get(course_id, DEFAULT_SCHEDULE),
+                statuses.get(course_id, False),
+                len(queues.get(course_id, ())),
+            )
+            for course_id, course_name in self.group_courses.get(group_id, {}).items()
+        ]
+    
+    def get_queue(self, group_id: int, course_id: str) -> List[QueueEntry]:
+        """Entries of a course queue in order, empty for unknown groups or courses (do not mutate)"""
+        return self.group_queues.get(group_id, _NO_QUEUES).get(course_id, [])
+    
+    def get_queue_size(self, group_id: int, course_id: str) -> int:
+        """Number of registrations in a course queue (0 for unknown groups or courses)"""
+        queue = self.group_queues.get(group_id, _NO_QUEUES).get(course_id)
+        return len(queue) if queue is not None else 0
+    
+    def count_group_registrations(self, group_id: int) -> int:
+        """Count registrations across all course queues of a group"""
+        return sum(map(len, self.group_queues.get(group_id, _NO_QUEUES).values()))
+    
     def is_admin(self, user_id: int) -> bool:
         """Check if user is admin (legacy method for backward compatibility)"""
         # Legacy global admins are deprecated - always return False
@@ -680,13 +1118,17 @@ class QueueManager:
     def is_dev(self, user_id: int) -> bool:
         """Check if user is a dev (global access)"""
         # Check against environment-based dev user IDs and config-based dev users
-        return user_id in DEV_USER_IDS or user_id in self.dev_users
+        return user_id in self._dev_set
     
     def is_group_admin(self, user_id: int, group_id) -> bool:
         """Check if user is admin for a specific group"""
-        # Convert group_id to string to match JSON format  
-        group_key = str(group_id)
-        return user_id in self.group_admins.get(group_key, [])
+        if not isinstance(group_id, int):
+            # Ids parsed from callback data may still be strings
+            try:
+                group_id = int(group_id)
+            except (ValueError, TypeError):
+                return False
+        return user_id in self._admin_sets.get(group_id, _NO_IDS)
     
     def has_admin_access(self, user_id: int, group_id = None) -> bool:
         """Check if user has admin access (dev, legacy admin, or group admin)"""
@@ -702,46 +1144,66 @@ class QueueManager:
         if group_id is not None:
             return self.is_group_admin(user_id, group_id)
         
-        # If no specific group, check if user is admin for any group
-        for gid in self.groups.keys():
-            if self.is_group_admin(user_id, gid):
-                return True
-        
-        return False
+        # If no specific group, check if user is admin for any known group
+        return any(gid in self.groups for gid in self._admin_groups_by_user.get(user_id, ()))
     
     def add_to_blacklist(self, user_id: int) -> tuple[bool, str]:
         """Add a user to the blacklist (dev only)"""
-        if user_id in self.blacklist:
+        if user_id in self._blacklist_set:
             return False, f"User {user_id} is already blacklisted."
         
         self.blacklist.append(user_id)
+        self._blacklist_set = frozenset(self.blacklist)
         self.save_config()
         return True, f"✅ User {user_id} has been added to the blacklist."
     
     def remove_from_blacklist(self, user_id: int) -> tuple[bool, str]:
         """Remove a user from the blacklist (dev only)"""
-        if user_id not in self.blacklist:
+        if user_id not in self._blacklist_set:
             return False, f"User {user_id} is not in the blacklist."
         
         self.blacklist.remove(user_id)
+        self._blacklist_set = frozenset(self.blacklist)
         self.save_config()
         return True, f"✅ User {user_id} has been removed from the blacklist."
     
+    def add_group_admin(self, group_id: int, user_id: int) -> bool:
+        """Make user_id an admin of group_id; False if they already are"""
+        admin_ids = self.group_admins.setdefault(str(group_id), [])  # group_admins keeps JSON str keys
+        if user_id in admin_ids:
+            return False
+        admin_ids.append(user_id)
+        self._rebuild_access_sets()
+        self.save_config()
+        return True
+    
+    def remove_group_admin(self, group_id: int, user_id: int) -> bool:
+        """Revoke user_id's admin rights for group_id; False if they were not an admin"""
+        admin_ids = self.group_admins.get(str(group_id))
+        if not admin_ids or user_id not in admin_ids:
+            return False
+        admin_ids.remove(user_id)
+        self._rebuild_access_sets()
+        self.save_config()
+        return True
+    
     def is_blacklisted(self, user_id: int) -> bool:
         """Check if a user is blacklisted"""
-        return user_id in self.blacklist
+        return user_id in self._blacklist_set
     
     def get_blacklist(self) -> list[int]:
         """Get the full blacklist"""
         return self.blacklist.copy()
     
-    def get_admin_groups(self, user_id: int) -> list[str]:
+    def get_admin_groups(self, user_id: int) -> list[int]:
         """Get list of group IDs where the user is an admin"""
-        admin_groups = []
-        for group_id, admin_ids in self.group_admins.items():
-            if user_id in admin_ids:
-                admin_groups.append(group_id)
-        return admin_groups
+        return list(self._admin_groups_by_user.get(user_id, ()))
+    
+    def get_managed_group_ids(self, user_id: int) -> list[int]:
+        """Known groups the user can administer: every group for devs, otherwise the ones they are admin of"""
+        if self.is_dev(user_id) or self.is_admin(user_id):
+            return list(self.groups)
+        return [group_id for group_id in self._admin_groups_by_user.get(user_id, ()) if group_id in self.groups]
     
     async def get_accessible_groups(self, bot, user_id: int) -> dict:
         """Return subset of self.groups the user is a member of.
@@ -772,77 +1234,63 @@ class QueueManager:
         return True
     
     def save_config(self):
-        """Save configuration to config.json with validation and atomic write"""
+        """Save configuration to config.json; saved by the next flush, or right away if flushing is off"""
+        self._state_version += 1
+        self._config_version += 1
+        if self.defer_saves:
+            self._config_dirty = True
+        else:
+            self._write_config()
+    
+    def _write_config(self):
+        """Serialize configuration and queue an atomic write of config.json"""
         try:
-            # Ensure group_queue_sizes is properly formatted (no duplicate keys)
-            cleaned_group_queue_sizes = {}
-            for group_id, size in self.group_queue_sizes.items():
-                # Convert to string key for consistency
-                key = str(group_id)
-                cleaned_group_queue_sizes[key] = size
-            
-            config = {
-                'groups': {},
-                'dev_users': self.dev_users,          # New dev users
-                'group_admins': dict(self.group_admins),  # Per-group admins
-                'max_queue_size': self.max_queue_size,  # Global default
-                'group_queue_sizes': cleaned_group_queue_sizes,  # Per-group queue sizes
-                'blacklist': self.blacklist  # Blacklisted user IDs
-            }
-            
-            # Save group configurations
-            for group_id, group_info in self.groups.items():
-                group_courses = {}
-                for course_id, course_name in self.group_courses.get(group_id, {}).items():
-                    group_courses[course_id] = {
-                        'name': course_name,
-                        'schedule': self.group_schedules.get(group_id, {}).get(course_id, {"day": 2, "time": "20:00"})
-                    }
-                
-                config['groups'][str(group_id)] = {
-                    'name': group_info['name'],
-                    'created_at': group_info['created_at'],
-                    'courses': group_courses
-                }
-            
-            # Atomic write: write to temporary file first, then rename
-            temp_config_file = self.config_file + '.tmp'
-            with open(temp_config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
-            
-            # Validate the written JSON by trying to parse it
-            with open(temp_config_file, 'r', encoding='utf-8') as f:
-                test_config = json.load(f)
-            
-            # If validation passes, replace the original file
-            import os
-            if os.path.exists(self.config_file):
-                os.replace(temp_config_file, self.config_file)
-            else:
-                os.rename(temp_config_file, self.config_file)
-                
-            logger.info("Config saved and validated successfully")
-                
+            # Serialize here, write (atomic rename) on the I/O thread
+            self._write_file(self.config_file, _dumps(self._build_config()), self._write_config_file)
         except Exception as e:
             logger.error(f"Error saving config: {e}")
-            # Clean up temp file if it exists
-            temp_config_file = self.config_file + '.tmp'
-            import os
-            if os.path.exists(temp_config_file):
-                os.remove(temp_config_file)
             raise
     
-    def reload_admin_config(self):
-        """Reload only admin configuration from config.json to ensure fresh data"""
+    def _build_config(self) -> dict:
+        """Build the config.json document from in-memory state (no I/O)"""
+        schedules = self.group_schedules
+        courses = self.group_courses
+        config = {
+            'groups': {
+                group_id: {  # int key; _dumps writes it as a JSON string
+                    'name': group_info['name'],
+                    'created_at': group_info['created_at'],
+                    'courses': {
+                        course_id: {
+                            'name': course_name,
+                            'schedule': schedules.get(group_id, {}).get(course_id, DEFAULT_SCHEDULE),
+                        }
+                        for course_id, course_name in courses.get(group_id, {}).items()
+                    },
+                }
+                for group_id, group_info in self.groups.items()
+            },
+            'dev_users': self.dev_users,          # New dev users
+            'group_admins': self.group_admins,  # Per-group admins (orjson writes the defaultdict as a plain object)
+            'max_queue_size': self.max_queue_size,  # Global default
+            'group_queue_sizes': self.group_queue_sizes,  # Per-group queue sizes (int keys, normalized at load)
+            'blacklist': self.blacklist  # Blacklisted user IDs
+        }
+        
+        return config
+    
+    @staticmethod
+    def _write_config_file(path: str, payload: bytes) -> None:
+        """Write config with _write_atomic, removing the temp file if the write fails"""
+        temp_config_file = path + '.tmp'
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                # Reload admin-related data
-                self.dev_users = config.get('dev_users', [])
-                self.group_admins = defaultdict(list, config.get('group_admins', {}))
-                logger.info("Admin configuration reloaded successfully")
-        except Exception as e:
-            logger.error(f"Error reloading admin config: {e}")
+            # payload came straight from orjson.dumps, so it is valid JSON; no need to re-read and parse it
+            _write_atomic(path, payload)
+            logger.info("Config saved successfully")
+        except Exception:
+            # Clean up temp file if it exists
+            with suppress(FileNotFoundError):
+                os.remove(temp_config_file)
             raise
     
     async def add_course(self, group_id: int, course_id: str, course_name: str, day: int, time: str, bot_instance) -> tuple[bool, str]:
@@ -868,7 +1316,7 @@ class QueueManager:
         
         # Validate time format
         try:
-            time_obj = datetime.strptime(time, "%H:%M").time()
+            time_obj = _parse_hhmm(time)
         except ValueError:
             return False, "Time must be in HH:MM format (e.g., '18:00')!"
         
@@ -877,21 +1325,20 @@ class QueueManager:
             self.group_courses[group_id][course_id] = course_name.strip()
             self.group_schedules[group_id][course_id] = {"day": day, "time": time}
             self.group_registration_status[group_id][course_id] = False  # Start closed
-            self.group_queues[group_id][course_id] = []  # Initialize empty queue
+            self.group_queues.setdefault(group_id, {})[course_id] = []  # Initialize empty queue
             
             # Save to config file
             self.save_config()
-            self.save_data()
+            self.mark_data_dirty()
             
             # Add scheduler job
             from apscheduler.triggers.cron import CronTrigger
-            day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
             
             job_id = f"registration_opener_{group_id}_{course_id}"
             trigger = CronTrigger(
                 day_of_week=day,
-                hour=int(time.split(':')[0]),
-                minute=int(time.split(':')[1]),
+                hour=time_obj.hour,
+                minute=time_obj.minute,
                 timezone=TIMEZONE
             )
             
@@ -906,17 +1353,17 @@ class QueueManager:
                 )
                 
                 next_run = trigger.get_next_fire_time(None, datetime.now(TIMEZONE))
-                logger.info(f"Scheduled {course_name} registration opening for group {group_id}: {day_names[day]}s at {time} (next: {next_run})")
+                logger.info(f"Scheduled {course_name} registration opening for group {group_id}: {DAY_NAMES[day]}s at {time} (next: {next_run})")
             
             group_name = self.groups[group_id]['name']
-            return True, f"Successfully added course '{course_name}' (ID: {course_id}) to {group_name} with schedule: {day_names[day]} at {time}"
+            return True, f"Successfully added course '{course_name}' (ID: {course_id}) to {group_name} with schedule: {DAY_NAMES[day]} at {time}"
             
         except Exception as e:
             # Rollback changes on error
             self.group_courses[group_id].pop(course_id, None)
             self.group_schedules[group_id].pop(course_id, None)  
             self.group_registration_status[group_id].pop(course_id, None)
-            self.group_queues[group_id].pop(course_id, None)
+            self.group_queues.get(group_id, {}).pop(course_id, None)
             logger.error(f"Error adding course to group {group_id}: {e}")
             return False, f"Failed to add course: {str(e)}"
     
@@ -930,7 +1377,7 @@ class QueueManager:
             return False, f"Course '{course_id}' does not exist in this group!"
         
         course_name = self.group_courses[group_id][course_id]
-        queue_size = len(self.group_queues[group_id].get(course_id, []))
+        queue_size = self.get_queue_size(group_id, course_id)
         
         if queue_size > 0:
             return False, f"Cannot remove course '{course_name}' - it has {queue_size} registered students. Clear the queue first."
@@ -940,11 +1387,12 @@ class QueueManager:
             removed_name = self.group_courses[group_id].pop(course_id, None)
             self.group_schedules[group_id].pop(course_id, None)
             self.group_registration_status[group_id].pop(course_id, None)
-            self.group_queues[group_id].pop(course_id, None)
+            self.group_queues.get(group_id, {}).pop(course_id, None)
+            self._drop_course_index(group_id, course_id)
             
             # Save changes
             self.save_config()
-            self.save_data()
+            self.mark_data_dirty()
             
             # Remove scheduler job
             job_id = f"registration_opener_{group_id}_{course_id}"
@@ -969,12 +1417,11 @@ class QueueManager:
             bot_member = await bot_instance.get_chat_member(group_id, bot_instance.id)
             # Bot is active if status is 'member', 'administrator', or 'creator'
             # Bot is NOT active if status is 'left' or 'kicked'
-            active_statuses = ['member', 'administrator', 'creator']
-            is_active = bot_member.status in active_statuses
+            is_active = bot_member.status in _ACTIVE_MEMBER_STATUSES
             logger.info(f"Bot membership check for group {group_id}: status='{bot_member.status}', active={is_active}")
             
             # Additional debugging for disbanded groups
-            if bot_member.status not in active_statuses:
+            if not is_active:
                 logger.warning(f"Bot has inactive status '{bot_member.status}' in group {group_id}")
                 
             return is_active
@@ -985,6 +1432,18 @@ class QueueManager:
             # For disbanded groups, this will typically throw a "Chat not found" or "Bad Request" error
             return False
     
+    async def check_bot_in_groups(self, bot_instance, group_ids) -> Dict[int, bool]:
+        """check_bot_in_group for several groups at once, with at most GROUP_CHECK_CONCURRENCY requests in flight"""
+        semaphore = asyncio.Semaphore(GROUP_CHECK_CONCURRENCY)
+        
+        async def probe(group_id):
+            async with semaphore:
+                return await self.check_bot_in_group(bot_instance, group_id)
+        
+        group_ids = list(group_ids)
+        results = await asyncio.gather(*(probe(group_id) for group_id in group_ids))
+        return dict(zip(group_ids, results))
+    
     def remove_stale_group(self, group_id: int) -> bool:
         """Remove a group and all its data (courses, queues, schedules, admins)"""
         try:
@@ -994,6 +1453,7 @@ class QueueManager:
             # Remove from groups
             if group_id in self.groups:
                 removed_data['group'] = self.groups.pop(group_id)
+                self._refresh_default_group()
             
             # Remove courses
             if group_id in self.group_courses:
@@ -1002,6 +1462,8 @@ class QueueManager:
             # Remove queues
             if group_id in self.group_queues:
                 removed_data['queues'] = self.group_queues.pop(group_id)
+                for course_id in removed_data['queues']:
+                    self._drop_course_index(group_id, course_id)
             
             # Remove schedules
             if group_id in self.group_schedules:
@@ -1010,10 +1472,21 @@ class QueueManager:
             # Remove group admins
             if group_id_str in self.group_admins:
                 removed_data['admins'] = self.group_admins.pop(group_id_str)
+                self._rebuild_access_sets()
+            
+            # Detach users associated with the group so they pick a group again
+            stale_users = [user_id for user_id, user_group_id in self.user_groups.items() if user_group_id == group_id]
+            for user_id in stale_users:
+                del self.user_groups[user_id]
+            if stale_users:
+                removed_data['user_groups'] = stale_users
             
             if removed_data:
                 logger.info(f"Removed stale group {group_id} and all its data: {list(removed_data.keys())}")
                 self.save_config()  # Save to config.json instead of data.json
+                if 'queues' in removed_data or stale_users:
+                    # Queues and user associations live in the data file
+                    self.mark_data_dirty()
                 return True
             else:
                 logger.info(f"No data found for group {group_id}")
@@ -1030,21 +1503,44 @@ class UniversityRegistrationBot:
     def __init__(self):
         self.application = None
         # State tracking for multi-step conversations
-        self.user_states = {}  # user_id -> conversation state
+        self.user_states: TTLCache[int, UserState] = TTLCache(maxsize=USER_STATE_MAXSIZE, ttl=USER_STATE_TTL)  # user_id -> conversation state
+        # user_id -> display name, to avoid a get_chat round-trip per rendered user
+        self._display_names: TTLCache[int, str] = TTLCache(maxsize=DISPLAY_NAME_MAXSIZE, ttl=DISPLAY_NAME_TTL)
+        self._display_name_misses: TTLCache[int, str] = TTLCache(maxsize=DISPLAY_NAME_MAXSIZE, ttl=DISPLAY_NAME_MISS_TTL)
         self.activity_windows = defaultdict(lambda: defaultdict(deque))
         self.activity_alert_cooldowns = {}
+        # Outgoing notifications, drained at MESSAGE_SEND_INTERVAL by _message_sender
+        self._send_queue: asyncio.Queue[tuple[int, str, dict]] = asyncio.Queue()
+        self._sender_task: asyncio.Task | None = None
+        # Group menu callbacks of the form '<action>_<group_id>', dispatched with one dict lookup
+        self._group_menu_callbacks = {
+            'view_courses': self.handle_view_courses_callback,
+            'register_courses': self.handle_register_courses_callback,
+            'help': self.handle_help_callback,
+            'confirm_switch': self.handle_confirm_switch_callback,
+            'back_to_menu': self.handle_back_to_menu_callback,
+        }
+        # Rendered status menus: group_id -> (queue_manager.state_version, (text, markup))
+        self._status_menus: Dict[int, tuple[int, tuple[str, InlineKeyboardMarkup]]] = {}
+        # Admin course keyboards: (action, group_id) -> (queue_manager.state_version, markup or None)
+        self._admin_course_menus: Dict[tuple[str, int], tuple[int, InlineKeyboardMarkup | None]] = {}
+        # Admin group pickers: (action, managed group_ids) -> (queue_manager.state_version, markup or None)
+        self._admin_group_menus: Dict[tuple[str, tuple[int, ...]], tuple[int, InlineKeyboardMarkup | None]] = {}
+        # (user_id, chat_id, message_id, callback data) of recent presses, to drop double-clicks
+        self._recent_callbacks: TTLCache[tuple[int, int, int, str], bool] = TTLCache(maxsize=4096, ttl=CALLBACK_DEDUP_WINDOW)
+        # (chat_id, message_id) -> (text Telegram shows, (text, kwargs) we sent) for edit_message_if_changed
+        self._last_edits: TTLCache[tuple[int, int], tuple[str, tuple[str, dict]]] = TTLCache(maxsize=LAST_EDIT_MAXSIZE, ttl=LAST_EDIT_TTL)
         
     def set_user_state(self, user_id: int, state: str, data: dict = None):
         """Set conversation state for a user"""
-        self.user_states[user_id] = {
-            'state': state,
-            'data': data or {},
-            'timestamp': datetime.now()
-        }
+        self.user_states[user_id] = UserState(state, data or {}, datetime.now())
     
-    def get_user_state(self, user_id: int) -> dict:
+    def get_user_state(self, user_id: int) -> UserState:
         """Get conversation state for a user"""
-        return self.user_states.get(user_id, {'state': 'none', 'data': {}})
+        user_state = self.user_states.get(user_id)
+        if user_state is None:
+            return UserState('none', {}, datetime.now())
+        return user_state
     
     def clear_user_state(self, user_id: int):
         """Clear conversation state for a user"""
@@ -1101,21 +1597,38 @@ class UniversityRegistrationBot:
     
     async def get_user_display_name(self, user_id: int) -> str:
         """Get user display name (username or full name or user ID)"""
+        # Check recent lookups before asking Telegram
+        cached = self._display_names.get(user_id) or self._display_name_misses.get(user_id)
+        if cached is not None:
+            return cached
         try:
             # Try to get user info from Telegram
             chat_member = await self.application.bot.get_chat(user_id)
             if chat_member.username:
-                return f"@{chat_member.username}"
+                display_name = f"@{chat_member.username}"
             elif chat_member.first_name:
-                full_name = chat_member.first_name
+                display_name = chat_member.first_name
                 if chat_member.last_name:
-                    full_name += f" {chat_member.last_name}"
-                return full_name
+                    display_name += f" {chat_member.last_name}"
             else:
-                return f"User {user_id}"
+                display_name = f"User {user_id}"
         except Exception:
             # If we can't get user info, fall back to user ID
-            return f"User {user_id}"
+            display_name = f"User {user_id}"
+            self._display_name_misses[user_id] = display_name
+            return display_name
+        self._display_names[user_id] = display_name
+        return display_name
+    
+    async def get_user_display_names(self, user_ids) -> list[str]:
+        """get_user_display_name for several users, fetched concurrently, in the order given"""
+        semaphore = asyncio.Semaphore(DISPLAY_NAME_FETCH_CONCURRENCY)
+        
+        async def fetch(user_id):
+            async with semaphore:
+                return await self.get_user_display_name(user_id)
+        
+        return await asyncio.gather(*(fetch(user_id) for user_id in user_ids))
     
     def get_chat_context(self, update: Update) -> tuple[int | None, str, bool]:
         """Get chat context: group_id, context_type, is_private_message"""
@@ -1150,6 +1663,9 @@ class UniversityRegistrationBot:
         # Check if bot was added to group
         bot_user = context.bot
         for new_member in update.message.new_chat_members:
+            # Drop cached names so a renamed user is looked up again
+            self._display_names.pop(new_member.id, None)
+            self._display_name_misses.pop(new_member.id, None)
             if new_member.id == bot_user.id:
                 # Bot was added to this group
                 group_id = update.effective_chat.id
@@ -1161,18 +1677,8 @@ class UniversityRegistrationBot:
                 await self.ensure_group_initialization(group_id, group_title)
                 
                 # Send welcome message to group
-                welcome_message = (
-                    f"👋 Привет! Я бот для записи на университетские курсы.\n\n"
-                    f"📝 **Как начать:**\n"
-                    f"1. Отправьте мне /start в личные сообщения\n"
-                    f"2. Выберите вашу группу из списка\n"
-                    f"3. Используйте /register в личных сообщениях для записи на курсы\n\n"
-                    f"🔒 **Важно:** Регистрация происходит только в личных сообщениях!\n\n"
-                    f"Используйте /list для просмотра доступных курсов."
-                )
-                
                 try:
-                    await update.message.reply_text(welcome_message)
+                    await update.message.reply_text(GROUP_WELCOME_MESSAGE)
                 except Exception as e:
                     logger.error(f"Failed to send welcome message to group {group_id}: {e}")
                 
@@ -1250,24 +1756,19 @@ class UniversityRegistrationBot:
             return
 
         # Multiple groups - show selection menu
-        keyboard = []
-        for group_id, group_info in available_groups.items():
-            group_name = group_info.get('name', f'Group {group_id}')
-            course_count = len(queue_manager.get_group_courses(int(group_id)))
-            button_text = f"📚 {group_name} ({course_count} курс{'ов' if course_count != 1 else ''})"
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=f"select_group_{group_id}")])
-
+        keyboard = [
+            [InlineKeyboardButton(
+                f"📚 {group_info.get('name', f'Group {group_id}')} ({count} {_plural_ru(count, COURSE_FORMS_RU)})",
+                callback_data=f"select_group_{group_id}",
+            )]
+            for group_id, group_info in available_groups.items()
+            for count in (queue_manager.get_group_view(int(group_id)).course_count,)
+        ]
         keyboard.append([InlineKeyboardButton("❌ Отмена", callback_data="cancel")])
         reply_markup = InlineKeyboardMarkup(keyboard)
 
-        message_text = (
-            "📍 **Выберите вашу группу курса:**\n\n"
-            "Выберите группу, к которой вы хотите подключиться для записи на курсы.\n"
-            "💡 *После выбора группы вы сможете записаться на курсы в этой группе.*"
-        )
-
         await update.message.reply_text(
-            message_text,
+            GROUP_SELECTION_PROMPT,
             reply_markup=reply_markup,
             parse_mode='Markdown'
         )
@@ -1278,13 +1779,8 @@ class UniversityRegistrationBot:
         
         user_id = update.effective_user.id
         
-        # Get current group info
-        group_info = queue_manager.groups.get(current_group_id, {})
-        group_name = group_info.get('name', f'Group {current_group_id}')
-        
-        # Get course count for this group
-        group_courses = queue_manager.get_group_courses(current_group_id)
-        course_count = len(group_courses)
+        # Get current group name and course count
+        group_view = queue_manager.get_group_view(current_group_id)
         
         # Check if user has admin permissions for this group
         is_admin = queue_manager.has_admin_access(user_id, current_group_id)
@@ -1302,8 +1798,8 @@ class UniversityRegistrationBot:
         
         message_text = (
             f"👤 **Ваша текущая группа:**\n\n"
-            f"📚 **Группа:** {group_name}\n"
-            f"📊 **Курсов доступно:** {course_count}\n"
+            f"📚 **Группа:** {group_view.name}\n"
+            f"📊 **Курсов доступно:** {group_view.course_count}\n"
             f"🔰 **Статус:** {admin_status}\n\n"
             f"**Выберите действие:**"
         )
@@ -1332,9 +1828,7 @@ class UniversityRegistrationBot:
             return
         
         # Show personalized help text in private message
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
-        help_text = self.get_user_help_text(user_id, group_name)
+        help_text = self.get_user_help_text(user_id, queue_manager.get_group_view(group_id).name)
         
         await update.message.reply_text(help_text, parse_mode='Markdown')
     
@@ -1353,46 +1847,28 @@ class UniversityRegistrationBot:
                 )
             return
         
-        group_courses = queue_manager.get_group_courses(group_id)
-        if not group_courses:
+        snapshot = queue_manager.snapshot_group(group_id)
+        if not snapshot:
             await update.message.reply_text("📚 Нет доступных курсов в этой группе.")
             return
         
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
-        
-        message_text = f"📚 **Доступные Курсы - {group_name}**\n\n"
-        
-        days = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"]
-        
-        group_schedules = queue_manager.get_group_schedules(group_id)
+        group_name = queue_manager.get_group_view(group_id).name
         
-        for course_id, course_name in group_courses.items():
-            # Get schedule info
-            schedule_info = group_schedules.get(course_id, {"day": 2, "time": "20:00"})
-            day_name = days[schedule_info['day']]
-            time_str = schedule_info['time']
-            schedule_text = f"{day_name} в {time_str}"
-            
-            # Get registration status
-            is_open = queue_manager.is_course_registration_open(group_id, course_id)
-            status_icon = "🟢" if is_open else "🔴"
-            status_text = "Открыто" if is_open else "Закрыто"
-            
-            # Get queue count
-            queue_count = len(queue_manager.group_queues[group_id].get(course_id, []))
-            
-            message_text += f"{status_icon} **{course_name}**\n"
-            message_text += f"   • Расписание: {schedule_text}\n"
-            message_text += f"   • Статус: {status_text}\n"
-            message_text += f"   • Зарегистрировано: {queue_count} студент{'ов' if queue_count != 1 else ''}\n\n"
+        parts = [f"📚 **Доступные Курсы - {group_name}**\n\n"]
+        for course_id, course_name, schedule_info, is_open, queue_count in snapshot:
+            parts.append(
+                f"{'🟢' if is_open else '🔴'} **{course_name}**\n"
+                f"   • Расписание: {DAY_NAMES_RU[schedule_info['day']]} в {schedule_info['time']}\n"
+                f"   • Статус: {'Открыто' if is_open else 'Закрыто'}\n"
+                f"   • Зарегистрировано: {queue_count} {_plural_ru(queue_count, STUDENT_FORMS_RU)}\n\n"
+            )
         
         if is_private:
-            message_text += "📱 Используйте /register чтобы записаться на открытый курс!"
+            parts.append("📱 Используйте /register чтобы записаться на открытый курс!")
         else:
-            message_text += "📱 Отправьте /register в личные сообщения для записи на курс!"
+            parts.append("📱 Отправьте /register в личные сообщения для записи на курс!")
         
-        await update.message.reply_text(message_text, parse_mode='Markdown')
+        await update.message.reply_text("".join(parts), parse_mode='Markdown')
     
     async def register_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /register command - show course menu (private messages only)"""
@@ -1448,9 +1924,9 @@ class UniversityRegistrationBot:
             await self.show_group_selection_menu(update, context.bot)
             return
 
-        # Check if ANY course has registration open for this group
-        group_courses = queue_manager.get_group_courses(group_id)
-        if not group_courses:
+        # Check if ANY course has registration open for this group (one pass over the group)
+        snapshot = queue_manager.snapshot_group(group_id)
+        if not snapshot:
             audit_event(
                 "register_command_no_courses",
                 user_id=user.id,
@@ -1461,20 +1937,22 @@ class UniversityRegistrationBot:
             await update.message.reply_text("📚 Нет доступных курсов в вашей группе.")
             return
         
-        open_courses = {course_id: course_name for course_id, course_name in group_courses.items() 
-                       if queue_manager.is_course_registration_open(group_id, course_id)}
+        open_courses = [
+            (course_id, course_name, count)
+            for course_id, course_name, _, is_open, count in snapshot
+            if is_open
+        ]
         
         if not open_courses:
             next_open = self.get_next_registration_time(group_id)
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
+            group_name = queue_manager.get_group_view(group_id).name
             audit_event(
                 "register_command_no_open_courses",
                 user_id=user.id,
                 username=user.username,
                 group_id=group_id,
                 group_name=group_name,
-                total_courses=len(group_courses),
+                total_courses=len(snapshot),
                 next_open=next_open,
                 update_id=update_id,
             )
@@ -1485,29 +1963,21 @@ class UniversityRegistrationBot:
             )
             return
         
-        keyboard = []
         # Create inline keyboard with ONLY open courses
-        for course_id, course_name in open_courses.items():
-            count = len(queue_manager.group_queues[group_id].get(course_id, []))
-            status = queue_manager.get_course_registration_status(group_id, course_id)
-            button_text = f"{course_name} ({count} записано) {status}"
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=f"register_{course_id}")])
-        
+        keyboard = [
+            [InlineKeyboardButton(f"{course_name} ({count} записано) {STATUS_OPEN_LABEL}", callback_data=f"register_{course_id}")]
+            for course_id, course_name, count in open_courses
+        ]
         keyboard.append([InlineKeyboardButton("❌ Отмена", callback_data="cancel")])
         
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
+        group_name = queue_manager.get_group_view(group_id).name
         message_text = f"📚 **Выберите курс для записи - {group_name}:**\n\n"
-        if len(open_courses) < len(group_courses):
-            closed_count = len(group_courses) - len(open_courses)
-            if closed_count == 1:
-                message_text += f"ℹ️ *1 курс сейчас закрыт*\n"
-            elif 2 <= closed_count <= 4:
-                message_text += f"ℹ️ *{closed_count} курса сейчас закрыты*\n"
-            else:  # 5+
-                message_text += f"ℹ️ *{closed_count} курсов сейчас закрыты*\n"
+        if len(open_courses) < len(snapshot):
+            closed_count = len(snapshot) - len(open_courses)
+            closed_word = _plural_ru(closed_count, ('закрыт', 'закрыты', 'закрыты'))
+            message_text += f"ℹ️ *{closed_count} {_plural_ru(closed_count, COURSE_FORMS_RU)} сейчас {closed_word}*\n"
 
         audit_event(
             "register_menu_shown",
@@ -1516,7 +1986,7 @@ class UniversityRegistrationBot:
             group_id=group_id,
             group_name=group_name,
             open_course_count=len(open_courses),
-            total_course_count=len(group_courses),
+            total_course_count=len(snapshot),
             source='register_command',
             update_id=update_id,
         )
@@ -1550,15 +2020,14 @@ class UniversityRegistrationBot:
         user_id = update.effective_user.id
         group_courses = queue_manager.get_group_courses(group_id)
         
-        # Check if user has any registrations in this group
-        has_registrations = False
-        for course_id in group_courses:
-            user_entries = [entry for entry in queue_manager.group_queues[group_id][course_id] if entry['user_id'] == user_id]
-            if user_entries:
-                has_registrations = True
-                break
+        # Count the user's registrations per course from the per-user index
+        user_courses = []
+        for course_id, course_name in group_courses.items():
+            count = len(queue_manager.get_user_entries(group_id, course_id, user_id))
+            if count:
+                user_courses.append((course_id, course_name, count))
         
-        if not has_registrations:
+        if not user_courses:
             await update.message.reply_text(
                 "❌ Вы не записаны ни на один курс в этой группе.",
                 parse_mode='Markdown'
@@ -1567,19 +2036,15 @@ class UniversityRegistrationBot:
         
         keyboard = []
         # Create inline keyboard with courses where user is registered
-        for course_id, course_name in group_courses.items():
-            user_entries = [entry for entry in queue_manager.group_queues[group_id][course_id] if entry['user_id'] == user_id]
-            if user_entries:
-                count = len(user_entries)
-                button_text = f"{course_name} ({count} запис{'и' if count > 1 else 'ь'})"
-                keyboard.append([InlineKeyboardButton(button_text, callback_data=f"unregister_{course_id}")])
+        for course_id, course_name, count in user_courses:
+            button_text = f"{course_name} ({count} {_plural_ru(count, ENTRY_FORMS_RU)})"
+            keyboard.append([InlineKeyboardButton(button_text, callback_data=f"unregister_{course_id}")])
         
         keyboard.append([InlineKeyboardButton("❌ Отмена", callback_data="cancel")])
         
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
+        group_name = queue_manager.get_group_view(group_id).name
         
         await update.message.reply_text(
             f"🗑️ **Выберите курс для удаления записи - {group_name}:**",
@@ -1602,34 +2067,11 @@ class UniversityRegistrationBot:
                 )
             return
         
-        group_courses = queue_manager.get_group_courses(group_id)
-        if not group_courses:
+        if not queue_manager.get_group_view(group_id).course_count:
             await update.message.reply_text("📚 Нет доступных курсов в этой группе.")
             return
         
-        keyboard = []
-        # Create inline keyboard with courses showing individual status
-        for course_id, course_name in group_courses.items():
-            count = len(queue_manager.group_queues[group_id].get(course_id, []))
-            status = queue_manager.get_course_registration_status(group_id, course_id)
-            button_text = f"{course_name} ({count}) {status}"
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=f"status_{course_id}")])
-        
-        keyboard.append([InlineKeyboardButton("📊 Сводка по всем курсам", callback_data="status_all")])
-        keyboard.append([InlineKeyboardButton("❌ Отмена", callback_data="cancel")])
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        # Show overall status summary
-        open_courses = sum(1 for course_id in group_courses if queue_manager.is_course_registration_open(group_id, course_id))
-        total_courses = len(group_courses)
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
-        
-        status_summary = f"📊 **Статус регистрации - {group_name}:** {open_courses}/{total_courses} курсов открыто"
-        
-        message = f"{status_summary}\n\n📋 **Выберите курс для просмотра очереди:**"
-        
+        message, reply_markup = self.build_status_menu(group_id)
         await update.message.reply_text(
             message,
             reply_markup=reply_markup,
@@ -1657,24 +2099,26 @@ class UniversityRegistrationBot:
         user_id = update.effective_user.id
         user_registrations = []
         group_courses = queue_manager.get_group_courses(group_id)
+        # The user's group may have been removed as stale; treat it as having no queues
+        group_queues = queue_manager.group_queues.get(group_id, _NO_QUEUES)
+        group_name = queue_manager.get_group_view(group_id).name
         
         for course_id, course_name in group_courses.items():
-            queue = queue_manager.group_queues[group_id][course_id]
-            for entry in queue:
-                if entry['user_id'] == user_id:
-                    reg_time = datetime.fromisoformat(entry['registered_at']).strftime("%d.%m %H:%M:%S")
-                    user_registrations.append(
-                        f"📚 **{course_name}**: {entry['full_name']} (поз. {entry['position']}) - {reg_time}"
-                    )
+            user_entries = queue_manager.get_user_entries(group_id, course_id, user_id)
+            if not user_entries:
+                continue
+            # Positions are list indexes; find them with one pass over this course only
+            positions = {id(entry): position for position, entry in enumerate(group_queues.get(course_id, ()), 1)}
+            for entry in user_entries:
+                reg_time = _format_registered_at(entry.registered_at, "%d.%m %H:%M:%S")
+                user_registrations.append(
+                    f"📚 **{course_name}**: {entry.full_name} (поз. {positions[id(entry)]}) - {reg_time}"
+                )
         
         if not user_registrations:
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
             await update.message.reply_text(f"Вы еще никого не записали в {group_name}.")
             return
         
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
         message = f"📝 **Ваши записи - {group_name}:**\n\n" + "\n".join(user_registrations)
         await update.message.reply_text(message, parse_mode='Markdown')
     
@@ -1686,35 +2130,36 @@ class UniversityRegistrationBot:
             return
         
         course_name = group_courses[course_id]
-        queue = queue_manager.group_queues[group_id][course_id]
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
+        queue = queue_manager.get_queue(group_id, course_id)
+        group_name = queue_manager.get_group_view(group_id).name
         
         if not queue:
             message = f"📚 **{course_name}** ({group_name})\n\n🔍 Пока нет записей."
         else:
-            message = f"📚 **{course_name}** \\({len(queue)} записано\\) - {group_name}\n\n"
-            message += "👥 **Записанные студенты:**\n"
-            
+            parts = [
+                f"📚 **{course_name}** \\({len(queue)} записано\\) - {group_name}\n\n",
+                "👥 **Записанные студенты:**\n",
+            ]
             for i, entry in enumerate(queue, 1):
-                reg_time = datetime.fromisoformat(entry['registered_at']).strftime("%d.%m %H:%M:%S")
-                registered_by = entry['username'] if entry['username'] != "Unknown" else f"User {entry['user_id']}"
-                message += f"{i}\\. **{entry['full_name']}** \\(от @{registered_by}\\) - {reg_time}\n"
+                reg_time = _format_registered_at(entry.registered_at, "%d.%m %H:%M:%S")
+                registered_by = entry.username if entry.username != "Unknown" else f"User {entry.user_id}"
+                parts.append(f"{i}\\. **{entry.full_name}** \\(от @{registered_by}\\) - {reg_time}\n")
             
             # Add queue limit info
             max_size = queue_manager.get_group_queue_size(group_id)
             remaining = max_size - len(queue)
             if remaining > 0:
-                message += f"\n📊 **Статус очереди:** {len(queue)}/{max_size} \\(осталось {remaining} мест\\)"
+                parts.append(f"\n📊 **Статус очереди:** {len(queue)}/{max_size} \\(осталось {remaining} мест\\)")
             else:
-                message += f"\n🔴 **Очередь заполнена:** {len(queue)}/{max_size}"
+                parts.append(f"\n🔴 **Очередь заполнена:** {len(queue)}/{max_size}")
+            message = "".join(parts)
         
         # Add back button
         keyboard = [[InlineKeyboardButton("⬅️ Вернуться к списку курсов", callback_data="back_to_status")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         try:
-            await query.edit_message_text(message, parse_mode='Markdown', reply_markup=reply_markup)
+            await self.edit_message_if_changed(query, message, parse_mode='Markdown', reply_markup=reply_markup)
         except Exception as e:
             # Handle markdown parsing errors by falling back to plain text
             if "can't parse entities" in str(e).lower():
@@ -1731,68 +2176,154 @@ class UniversityRegistrationBot:
     async def show_all_courses_summary(self, query, group_id: int):
         """Show summary of all courses for a specific group"""
         group_courses = queue_manager.get_group_courses(group_id)
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
+        group_queues = queue_manager.group_queues.get(group_id, _NO_QUEUES)
+        group_name = queue_manager.get_group_view(group_id).name
         
-        if not any(queue_manager.group_queues[group_id].values()):
+        if not any(group_queues.values()):
             message = f"📋 **Сводка курсов - {group_name}**\n\n🔍 Пока нет записей ни на один курс."
         else:
-            message = f"📋 **Сводка курсов - {group_name}**\n\n"
+            parts = [f"📋 **Сводка курсов - {group_name}**\n\n"]
             
             for course_id, course_name in group_courses.items():
-                count = len(queue_manager.group_queues[group_id][course_id])
+                queue = group_queues.get(course_id, ())
+                count = len(queue)
                 if count > 0:
                     # Show first 3 names for quick overview
-                    queue = queue_manager.group_queues[group_id][course_id]
-                    first_names = [entry['full_name'] for entry in queue[:3]]
-                    names_preview = ", ".join(first_names)
-                    if len(queue) > 3:
-                        names_preview += f", ... (+{len(queue) - 3} еще)"
+                    names_preview = ", ".join(entry.full_name for entry in queue[:3])
+                    if count > 3:
+                        names_preview += f", ... (+{count - 3} еще)"
                     
-                    message += f"📚 **{course_name}**: {count} записано\n"
-                    message += f"   👥 {names_preview}\n\n"
+                    parts.append(f"📚 **{course_name}**: {count} записано\n   👥 {names_preview}\n\n")
                 else:
-                    message += f"📚 **{course_name}**: 0 записано\n\n"
+                    parts.append(f"📚 **{course_name}**: 0 записано\n\n")
+            message = "".join(parts)
         
         # Add back button
         keyboard = [[InlineKeyboardButton("⬅️ Вернуться к списку курсов", callback_data="back_to_status")]]
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         try:
-            await query.edit_message_text(message, parse_mode='Markdown', reply_markup=reply_markup)
+            await self.edit_message_if_changed(query, message, parse_mode='Markdown', reply_markup=reply_markup)
         except Exception as e:
             # Handle "Message is not modified" and other edit errors silently
             if "not modified" not in str(e).lower():
                 logger.error(f"Error editing message in show_all_courses_summary: {e}")
             # For "not modified" errors, we silently ignore since it's expected
     
-    async def show_status_selection_menu(self, query, group_id: int):
-        """Show the status course selection menu for a specific group"""
-        group_courses = queue_manager.get_group_courses(group_id)
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
+    def build_status_menu(self, group_id: int) -> tuple[str, InlineKeyboardMarkup]:
+        """Status menu text and keyboard for a group, reused until queue or config state changes"""
+        cached = self._status_menus.get(group_id)
+        if cached and cached[0] == queue_manager.state_version:
+            return cached[1]
+        
+        menu = self._render_status_menu(group_id, queue_manager.snapshot_group(group_id))
+        self._status_menus[group_id] = (queue_manager.state_version, menu)
+        return menu
+    
+    def _render_status_menu(self, group_id: int, snapshot: list) -> tuple[str, InlineKeyboardMarkup]:
+        """Build the status menu in one pass over the group's course snapshot"""
+        group_name = queue_manager.get_group_view(group_id).name
         
         keyboard = []
+        open_courses = 0
         # Create inline keyboard with courses showing individual status
-        for course_id, course_name in group_courses.items():
-            count = len(queue_manager.group_queues[group_id][course_id])
-            status = queue_manager.get_course_registration_status(group_id, course_id)
-            button_text = f"{course_name} ({count}) {status}"
+        for course_id, course_name, _, is_open, count in snapshot:
+            open_courses += is_open
+            button_text = f"{course_name} ({count}) {'🟢 Open' if is_open else '🔴 Closed'}"
             keyboard.append([InlineKeyboardButton(button_text, callback_data=f"status_{course_id}")])
         
         keyboard.append([InlineKeyboardButton("📊 Сводка по всем курсам", callback_data="status_all")])
         keyboard.append([InlineKeyboardButton("❌ Отмена", callback_data="cancel")])
         
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        # Show overall status summary  
-        open_courses = sum(1 for course_id in group_courses if queue_manager.is_course_registration_open(group_id, course_id))
-        total_courses = len(group_courses)
-        status_summary = f"📊 **Статус регистрации - {group_name}:** {open_courses}/{total_courses} курсов открыто"
-        
+        # Show overall status summary
+        status_summary = f"📊 **Статус регистрации - {group_name}:** {open_courses}/{len(snapshot)} курсов открыто"
         message = f"{status_summary}\n\n📋 **Выберите курс для просмотра очереди:**"
+        return message, InlineKeyboardMarkup(keyboard)
+    
+    def build_admin_course_menu(self, action: str, group_id: int) -> InlineKeyboardMarkup | None:
+        """Course keyboard for the admin open/close/remove/clear menus, reused until queue or config state changes"""
+        key = (action, group_id)
+        cached = self._admin_course_menus.get(key)
+        if cached and cached[0] == queue_manager.state_version:
+            return cached[1]
+        
+        markup = self._render_admin_course_menu(action, group_id, queue_manager.snapshot_group(group_id))
+        self._admin_course_menus[key] = (queue_manager.state_version, markup)
+        return markup
+    
+    def build_admin_group_menu(self, action: str, group_ids: list[int]) -> InlineKeyboardMarkup | None:
+        """Group picker for /admin_open, /admin_close, /admin_status and /admin_clear, reused until state changes"""
+        key = (action, tuple(group_ids))
+        cached = self._admin_group_menus.get(key)
+        if cached and cached[0] == queue_manager.state_version:
+            return cached[1]
+        
+        markup = self._render_admin_group_menu(action, key[1])
+        self._admin_group_menus[key] = (queue_manager.state_version, markup)
+        return markup
+    
+    def _render_admin_group_menu(self, action: str, group_ids: tuple[int, ...]) -> InlineKeyboardMarkup | None:
+        """Build an admin group picker; None for 'status'/'clear' when there is nothing to list"""
+        keyboard = []
+        for group_id in group_ids:
+            group_view = queue_manager.get_group_view(group_id)
+            if action in ('open', 'close'):
+                label = f"{group_view.name} ({group_view.course_count} courses)"
+            else:
+                group_queue_count = queue_manager.count_group_registrations(group_id)
+                if action == 'clear' and not group_queue_count:
+                    continue
+                label = f"{group_view.name} ({group_queue_count} total registrations)"
+            keyboard.append([InlineKeyboardButton(label, callback_data=f"admin_{action}_group_{group_id}")])
+        
+        if not keyboard and action in ('status', 'clear'):
+            return None
+        if action == 'close':
+            # Add option to close all courses
+            keyboard.append([InlineKeyboardButton("🔴 Close ALL Courses", callback_data="admin_close_all")])
+        keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="cancel")])
+        return InlineKeyboardMarkup(keyboard)
+    
+    def _render_admin_course_menu(self, action: str, group_id: int, snapshot: list) -> InlineKeyboardMarkup | None:
+        """Build an admin course keyboard; None for 'clear' when every queue is empty"""
+        keyboard = []
+        if action in ('open', 'close'):
+            for course_id, course_name, _, is_open, _ in snapshot:
+                keyboard.append([InlineKeyboardButton(
+                    f"{course_name} {'🟢' if is_open else '🔴'}",
+                    callback_data=f"admin_{action}_course_{group_id}_{course_id}"
+                )])
+            if action == 'open':
+                keyboard.append([InlineKeyboardButton("🟢 Open ALL in Group", callback_data=f"admin_open_all_{group_id}")])
+            else:
+                keyboard.append([InlineKeyboardButton("🔴 Close ALL in Group", callback_data=f"admin_close_all_{group_id}")])
+        elif action == 'remove':
+            for course_id, course_name, _, _, queue_size in snapshot:
+                status_text = f" ({queue_size} registered)" if queue_size > 0 else ""
+                keyboard.append([InlineKeyboardButton(
+                    f"🗑️ {course_name}{status_text}",
+                    callback_data=f"remove_course_{group_id}_{course_id}"
+                )])
+        else:
+            total_registered = 0
+            for course_id, course_name, _, _, queue_size in snapshot:
+                if queue_size:
+                    total_registered += queue_size
+                    keyboard.append([InlineKeyboardButton(
+                        f"🗑️ Clear {course_name} ({queue_size} registered)",
+                        callback_data=f"admin_clear_{group_id}_{course_id}"
+                    )])
+            if not total_registered:
+                return None
+            keyboard.append([InlineKeyboardButton(f"🗑️ Clear All Queues ({total_registered} total)", callback_data=f"admin_clear_all_confirm_{group_id}")])
         
-        await query.edit_message_text(message, parse_mode='Markdown', reply_markup=reply_markup)
+        keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="cancel")])
+        return InlineKeyboardMarkup(keyboard)
+    
+    async def show_status_selection_menu(self, query, group_id: int):
+        """Show the status course selection menu for a specific group"""
+        message, reply_markup = self.build_status_menu(group_id)
+        await self.edit_message_if_changed(query, message, parse_mode='Markdown', reply_markup=reply_markup)
 
     async def show_registration_selection(self, query, group_id: int, course_id: str, user_entries: list):
         """Show selection of specific registrations to remove when user has multiple"""
@@ -1802,8 +2333,8 @@ class UniversityRegistrationBot:
         keyboard = []
         
         for i, entry in enumerate(user_entries):
-            reg_time = datetime.fromisoformat(entry['registered_at']).strftime("%d %b, %H:%M")
-            button_text = f"📝 {entry['full_name']} - {reg_time}"
+            reg_time = _format_registered_at(entry.registered_at, "%d %b, %H:%M")
+            button_text = f"📝 {entry.full_name} - {reg_time}"
             keyboard.append([InlineKeyboardButton(button_text, callback_data=f"remove_{course_id}_{i}")])
         
         keyboard.append([InlineKeyboardButton("❌ Отмена", callback_data="cancel")])
@@ -1811,65 +2342,96 @@ class UniversityRegistrationBot:
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         message = (f"🗑️ **Удалить запись с {course_name}**\n\n"
-                  f"У вас {len(user_entries)} запис{'и' if len(user_entries) > 1 else 'ь'}:\n"
+                  f"У вас {len(user_entries)} {_plural_ru(len(user_entries), ENTRY_FORMS_RU)}:\n"
                   "Выберите, какую удалить:")
         
         await query.edit_message_text(message, parse_mode='Markdown', reply_markup=reply_markup)
 
+    async def edit_message_if_changed(self, query, text: str, **kwargs):
+        """Edit a callback message unless it already shows exactly this text and keyboard"""
+        message = query.message
+        key = (message.chat_id, message.message_id) if message else None
+        last = self._last_edits.get(key)
+        # The shown text must still match our last edit, so edits made elsewhere are never skipped
+        if last is not None and last[0] == message.text and last[1] == (text, kwargs):
+            return
+        edited = await query.edit_message_text(text, **kwargs)
+        if key is not None and edited is not True:
+            self._last_edits[key] = (edited.text, (text, kwargs))
+    
+    def edit_in_background(self, query, text: str, **kwargs):
+        """Schedule a final callback edit so the handler returns without waiting on Telegram"""
+        self.application.create_task(self._edit_message_safely(query, text, **kwargs))
+    
+    async def _edit_message_safely(self, query, text: str, **kwargs):
+        """Edit a callback message, logging failures since nobody awaits the result"""
+        try:
+            await query.edit_message_text(text, **kwargs)
+        except Exception as e:
+            logger.error(f"Failed to edit message for callback {query.data}: {e}")
+    
     async def remove_registration(self, query, group_id: int, course_id: str, entry_index: int):
         """Remove specific registration and update data"""
         user_id = query.from_user.id
-        user_entries = [entry for entry in queue_manager.group_queues[group_id][course_id] 
-                       if entry['user_id'] == user_id]
+        user_entries = queue_manager.get_user_entries(group_id, course_id, user_id)
         
         if entry_index >= len(user_entries):
             await query.edit_message_text("❌ Ошибка: недопустимый выбор записи.")
             return
         
-        # Find the actual entry in the full queue
+        # Remove the specific entry (updates the indexes and saves)
         entry_to_remove = user_entries[entry_index]
-        full_queue = queue_manager.group_queues[group_id][course_id]
-        
-        # Remove the specific entry
-        for i, entry in enumerate(full_queue):
-            if (entry['user_id'] == entry_to_remove['user_id'] and 
-                entry['full_name'] == entry_to_remove['full_name'] and
-                entry['registered_at'] == entry_to_remove['registered_at']):
-                full_queue.pop(i)
-                break
-        
-        # Update positions for remaining entries
-        for i, entry in enumerate(full_queue):
-            entry['position'] = i + 1
-        
-        # Save to file
-        queue_manager.save_data()
+        queue_manager.remove_user_entry(group_id, course_id, entry_to_remove)
         
         group_courses = queue_manager.get_group_courses(group_id)
         course_name = group_courses[course_id]
-        removed_name = entry_to_remove['full_name']
+        removed_name = entry_to_remove.full_name
         
         # Show success message
-        remaining_count = len([e for e in queue_manager.group_queues[group_id][course_id] if e['user_id'] == user_id])
+        remaining_count = len(queue_manager.get_user_entries(group_id, course_id, user_id))
         
         message = f"✅ **Успешно удалено!**\n\n"
         message += f"📚 **Курс:** {course_name}\n"
         message += f"👤 **Имя:** {removed_name}\n"
         
         if remaining_count > 0:
-            if remaining_count == 1:
-                message += f"\n💡 У вас все еще есть 1 другая запись на этот курс."
-            else:
-                message += f"\n💡 У вас все еще есть {remaining_count} других записи на этот курс."
+            other_word = _plural_ru(remaining_count, ('другая', 'другие', 'других'))
+            message += f"\n💡 У вас все еще есть {remaining_count} {other_word} {_plural_ru(remaining_count, ENTRY_FORMS_RU)} на этот курс."
         
-        await query.edit_message_text(message, parse_mode='Markdown')
+        self.edit_in_background(query, message, parse_mode='Markdown')
+    
+    async def _answer_callback_safely(self, query):
+        """Answer a callback query, logging failures since nobody awaits the result"""
+        try:
+            await query.answer()
+        except Exception as e:
+            logger.warning(f"Failed to answer callback {query.data}: {e}")
     
     async def callback_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle inline keyboard callbacks"""
         query = update.callback_query
-        await query.answer()
+        # Answer concurrently with the handler's own edit instead of spending a round trip first
+        self.application.create_task(self._answer_callback_safely(query))
         
         data = query.data
+        
+        # Drop a second press of the same button while the first one is still fresh
+        if query.message is not None:
+            press = (query.from_user.id, query.message.chat_id, query.message.message_id, data)
+            if press in self._recent_callbacks:
+                return
+            self._recent_callbacks[press] = True
+        
+        # Group menu navigation is the most common callback; dispatch it before the prefix chain below
+        if data == "switch_group":
+            await self.handle_switch_group_callback(query, context)
+            return
+        action, _, arg = data.rpartition('_')
+        handler = self._group_menu_callbacks.get(action)
+        if handler is not None and arg.lstrip('-').isdigit():
+            await handler(query, int(arg), context)
+            return
+        
         user = query.from_user
         user_id = query.from_user.id
         
@@ -1886,17 +2448,229 @@ class UniversityRegistrationBot:
             await self.show_current_group_menu_edit(query, current_group_id)
             return
 
+        # User-facing callbacks come before the dev/admin prefixes, which only staff ever press
+        if data.startswith("select_group_"):
+            # Handle group selection
+            selected_group_id = int(data.removeprefix("select_group_"))
+            user_id = user.id
+            
+            # Validate group exists
+            group_info = queue_manager.groups.get(selected_group_id)
+            if group_info is None:
+                await query.edit_message_text("❌ Выбранная группа не найдена!")
+                return
+            
+            # Associate user with selected group
+            await self.associate_user_with_group(user_id, selected_group_id)
+            
+            # Show success message
+            group_name = group_info.get('name', f'Group {selected_group_id}')
+            course_count = len(queue_manager.get_group_courses(selected_group_id))
+            
+            success_message = f"""✅ **Успешно подключены к группе!**
+
+📍 **Группа:** {group_name}
+📚 **Курсов доступно:** {course_count}
+
+🎯 **Что дальше:**
+• `/list` - Просмотр доступных курсов и расписаний
+• `/register` - Запись на открытые курсы
+• `/status` - Проверка текущих очередей
+
+Добро пожаловать! 🎓"""
+            
+            await query.edit_message_text(success_message, parse_mode='Markdown')
+            return
+        
+        # Well-formed register_courses_<group_id> is dispatched at the top
+        if data.startswith("register_courses_"):
+            logger.warning(f"Malformed group menu callback: {data}")
+            return
+        
+        if data.startswith("register_"):
+            course_id = data.removeprefix("register_")
+            
+            # Get user's associated group
+            user_id = query.from_user.id
+            associated_group = queue_manager.get_user_group(user_id)
+            
+            # Use associated group if no group context from chat
+            if not group_id:
+                group_id = associated_group
+            
+            # Validate group context
+            if not group_id:
+                audit_event(
+                    "register_course_click_blocked_no_group",
+                    user_id=user_id,
+                    username=query.from_user.username,
+                    course_id=course_id,
+                    update_id=getattr(update, 'update_id', None),
+                )
+                await query.edit_message_text("❌ Группа не найдена! Повторите попытку после взаимодействия с ботом в группе курса.")
+                return
+            
+            # Validate course exists in this group
+            group_courses = queue_manager.get_group_courses(group_id)
+            if course_id not in group_courses:
+                audit_event(
+                    "register_course_click_blocked_invalid_course",
+                    user_id=user_id,
+                    username=query.from_user.username,
+                    group_id=group_id,
+                    course_id=course_id,
+                    update_id=getattr(update, 'update_id', None),
+                )
+                await query.edit_message_text(f"❌ Недопустимый курс для этой группы! (group_id: {group_id}, course_id: {course_id})")
+                return
+            
+            # Ask for full name
+            course_name = group_courses[course_id]
+            audit_event(
+                "register_course_clicked",
+                user_id=user_id,
+                username=query.from_user.username,
+                group_id=group_id,
+                course_id=course_id,
+                course_name=course_name,
+                update_id=getattr(update, 'update_id', None),
+            )
+            self.track_activity(
+                'register_course_click',
+                user_id,
+                username=query.from_user.username,
+                group_id=group_id,
+                course_id=course_id,
+                source='callback_query',
+                update_id=getattr(update, 'update_id', None),
+            )
+            await query.edit_message_text(
+                f"📝 Вы выбрали: **{course_name}**\n\n"
+                "Ответьте с полным именем для записи:\n"
+                "💡 *Вы можете записать себя или друзей*\n"
+                "⚠️ *Каждое имя может быть записано только один раз на курс*",
+                parse_mode='Markdown'
+            )
+            
+            # Store course and group selection in user data
+            context.user_data['selected_course'] = course_id
+            context.user_data['selected_group'] = group_id
+            context.user_data['awaiting_name'] = True
+            return
+        
+        if data.startswith("status_"):
+            if not group_id:
+                await query.edit_message_text("❌ Группа не найдена!")
+                return
+                
+            if data == "status_all":
+                # Show summary of all courses for this group
+                await self.show_all_courses_summary(query, group_id)
+            else:
+                # Show detailed status for specific course
+                course_id = data.removeprefix("status_")
+                await self.show_course_detailed_status(query, group_id, course_id)
+            return
+        
+        if data.startswith("unregister_"):
+            course_id = data.removeprefix("unregister_")
+            user_id = user.id
+            
+            # Validate group context
+            if not group_id:
+                await query.edit_message_text("❌ Группа не найдена! Сначала взаимодействуйте с ботом в группе курса.")
+                return
+            
+            # Validate that the course exists in the group
+            group_courses = queue_manager.get_group_courses(group_id)
+            if not group_courses or course_id not in group_courses:
+                await query.edit_message_text("❌ Курс не найден в вашей группе!")
+                return
+            
+            # Get all registrations for this user in this course in this group
+            user_entries = queue_manager.get_user_entries(group_id, course_id, user_id)
+            
+            if not user_entries:
+                await query.edit_message_text(
+                    f"❌ Вы не записаны на {group_courses[course_id]}."
+                )
+                return
+            
+            if len(user_entries) == 1:
+                # Only one registration, remove it directly
+                await self.remove_registration(query, group_id, course_id, 0)  # Index 0 for single entry
+                return
+            else:
+                # Multiple registrations, show selection
+                await self.show_registration_selection(query, group_id, course_id, user_entries)
+                return
+        
+        # Handle course removal selection (must be before general remove_ handler)
+        if data.startswith("remove_course_"):
+            parts = data.removeprefix("remove_course_").split("_", 1)
+            if len(parts) == 2:
+                group_id, course_id = int(parts[0]), parts[1]
+                await self.handle_remove_course_callback(query, group_id, course_id, context)
+            else:
+                # Legacy format support (no group_id) - find group from course_id and chat context
+                course_id = data.removeprefix("remove_course_")
+                
+                # Get group_id from chat context
+                chat_id = query.message.chat_id
+                chat_type = query.message.chat.type
+                
+                if chat_type in [Chat.GROUP, Chat.SUPERGROUP]:
+                    target_group_id = chat_id
+                else:
+                    # For private chats, find the group that contains this course
+                    target_group_id = queue_manager.find_course_group(course_id)
+                
+                if target_group_id:
+                    await self.handle_remove_course_callback(query, target_group_id, course_id, context)
+                else:
+                    await query.edit_message_text("❌ Course not found or access denied!")
+                    await query.answer()
+            return
+        
+        if data.startswith("remove_"):
+            # Format: remove_{course_id}_{index}
+            # Course ids may contain underscores; the index is always after the last one
+            course_id, sep, index_text = data.removeprefix("remove_").rpartition("_")
+            if sep:
+                try:
+                    entry_index = int(index_text)
+                    if not group_id:
+                        await query.edit_message_text("❌ Группа не найдена!")
+                        return
+                    await self.remove_registration(query, group_id, course_id, entry_index)
+                    return
+                except ValueError:
+                    logger.error(f"Invalid entry index in callback data: {data}")
+                    await query.answer("Invalid data format")
+                    return
+            else:
+                logger.error(f"Invalid remove callback format: {data}")
+                await query.answer("Invalid data format")
+                return
+
+        if data == "back_to_status":
+            # Recreate the status selection menu
+            if not group_id:
+                await query.edit_message_text("❌ Группа не найдена!")
+                return
+            await self.show_status_selection_menu(query, group_id)
+            return
+
         # Handle dev command callbacks
         if data.startswith("dev_add_admin_group_"):
-            group_id = int(data.replace("dev_add_admin_group_", ""))
+            group_id = int(data.removeprefix("dev_add_admin_group_"))
             if not queue_manager.is_dev(user_id):
                 await query.edit_message_text("❌ Access denied. Dev privileges required.")
                 return
             
             # Store the group_id for the next step and prompt for user ID
             self.set_user_state(user_id, 'dev_add_admin', {'group_id': group_id})
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
+            group_name = queue_manager.get_group_view(group_id).name
             
             await query.edit_message_text(
                 f"👑 **Add Admin to {group_name}**\n\n"
@@ -1907,7 +2681,7 @@ class UniversityRegistrationBot:
             return
 
         if data.startswith("dev_remove_admin_group_"):
-            group_id = data.replace("dev_remove_admin_group_", "")  # Keep as string
+            group_id = data.removeprefix("dev_remove_admin_group_")  # Keep as string
             user_id = query.from_user.id
             if not queue_manager.is_dev(user_id):
                 await query.edit_message_text("❌ Access denied. Dev privileges required.")
@@ -1928,8 +2702,8 @@ class UniversityRegistrationBot:
             except (ValueError, TypeError):
                 group_name = f'Group {group_id}'
             
-            for admin_user_id in admin_list:
-                admin_name = await self.get_user_display_name(admin_user_id)
+            admin_names = await self.get_user_display_names(admin_list)
+            for admin_user_id, admin_name in zip(admin_list, admin_names):
                 keyboard.append([InlineKeyboardButton(
                     f"Remove {admin_name}", 
                     callback_data=f"dev_confirm_remove_admin_{group_id}_{admin_user_id}"
@@ -1947,55 +2721,45 @@ class UniversityRegistrationBot:
             return
 
         if data.startswith("dev_confirm_remove_admin_"):
-            parts = data.replace("dev_confirm_remove_admin_", "").split("_", 1)
+            parts = data.removeprefix("dev_confirm_remove_admin_").split("_", 1)
             if len(parts) == 2:
-                group_id, admin_user_id = parts[0], int(parts[1])  # group_id stays as string
+                group_id, admin_user_id = int(parts[0]), int(parts[1])
                 user_id = query.from_user.id
                 if not queue_manager.is_dev(user_id):
                     await query.edit_message_text("❌ Access denied. Dev privileges required.")
                     return
                 
-                # Remove admin from group
-                if group_id in queue_manager.group_admins and admin_user_id in queue_manager.group_admins[group_id]:
-                    queue_manager.group_admins[group_id].remove(admin_user_id)
-                    queue_manager.save_config()
-                    
-                    # Reload admin config to ensure permissions are immediately removed
-                    queue_manager.reload_admin_config()
+                # Remove admin from group; permissions are revoked in memory right away
+                if queue_manager.remove_group_admin(group_id, admin_user_id):
+                    await queue_manager.flush_pending()
                     
-                    # Convert string group_id to int to match groups dictionary
-                    try:
-                        group_id_int = int(group_id)
-                        group_info = queue_manager.groups.get(group_id_int, {})
-                        group_name = group_info.get('name', f'Group {group_id}')
-                    except (ValueError, TypeError):
-                        group_name = f'Group {group_id}'
-                        
+                    group_name = queue_manager.get_group_view(group_id).name
                     admin_name = await self.get_user_display_name(admin_user_id)
                     
                     # Update command suggestions for the removed admin
                     await self.setup_user_commands(admin_user_id)
                     
-                    await query.edit_message_text(
+                    self.edit_in_background(
+                        query,
                         f"✅ Removed admin {admin_name} from {group_name}!\n"
                         f"Their command suggestions have been updated."
                     )
                 else:
-                    await query.edit_message_text("❌ Admin not found in group.")
+                    self.edit_in_background(query, "❌ Admin not found in group.")
             return
         
         # Handle dev cleanup callbacks
         if data.startswith("dev_cleanup_group_"):
-            group_id = int(data.replace("dev_cleanup_group_", ""))
+            group_id = int(data.removeprefix("dev_cleanup_group_"))
             user_id = query.from_user.id
             if not queue_manager.is_dev(user_id):
                 await query.edit_message_text("❌ Access denied. Dev privileges required.")
                 return
             
-            group_info = queue_manager.groups.get(str(group_id), {})
-            group_name = group_info.get('name', f'Group {group_id}')
-            course_count = len(queue_manager.group_courses.get(str(group_id), {}))
-            queue_count = sum(len(q) for q in queue_manager.group_queues.get(str(group_id), {}).values())
+            group_view = queue_manager.get_group_view(group_id)
+            group_name = group_view.name
+            course_count = group_view.course_count
+            queue_count = queue_manager.count_group_registrations(group_id)
             
             # Confirm removal
             keyboard = [
@@ -2032,14 +2796,15 @@ class UniversityRegistrationBot:
             total_courses = 0
             total_registrations = 0
             
-            # Check each group and remove stale ones
+            # Check all groups concurrently, then remove the stale ones
             stale_groups = []
-            for group_id, group_info in list(queue_manager.groups.items()):
-                is_member = await queue_manager.check_bot_in_group(self.application.bot, group_id)
-                if not is_member:
+            groups = list(queue_manager.groups.items())
+            membership = await queue_manager.check_bot_in_groups(self.application.bot, [group_id for group_id, _ in groups])
+            for group_id, group_info in groups:
+                if not membership[group_id]:
                     group_name = group_info.get('name', f'Group {group_id}')
                     course_count = len(queue_manager.group_courses.get(group_id, {}))
-                    queue_count = sum(len(q) for q in queue_manager.group_queues.get(group_id, {}).values())
+                    queue_count = queue_manager.count_group_registrations(group_id)
                     
                     stale_groups.append((group_id, group_name, course_count, queue_count))
                     total_courses += course_count
@@ -2063,19 +2828,20 @@ class UniversityRegistrationBot:
             return
         
         if data.startswith("dev_confirm_cleanup_"):
-            group_id = int(data.replace("dev_confirm_cleanup_", ""))
+            group_id = int(data.removeprefix("dev_confirm_cleanup_"))
             user_id = query.from_user.id
             if not queue_manager.is_dev(user_id):
                 await query.edit_message_text("❌ Access denied. Dev privileges required.")
                 return
             
-            group_info = queue_manager.groups.get(str(group_id), {})
-            group_name = group_info.get('name', f'Group {group_id}')
-            course_count = len(queue_manager.group_courses.get(str(group_id), {}))
-            queue_count = sum(len(q) for q in queue_manager.group_queues.get(str(group_id), {}).values())
+            group_view = queue_manager.get_group_view(group_id)
+            group_name = group_view.name
+            course_count = group_view.course_count
+            queue_count = queue_manager.count_group_registrations(group_id)
             
             if queue_manager.remove_stale_group(group_id):
-                await query.edit_message_text(
+                self.edit_in_background(
+                    query,
                     f"✅ **Successfully Removed**\n\n"
                     f"**Group:** {group_name}\n"
                     f"**Removed:** {course_count} courses, {queue_count} registrations\n\n"
@@ -2083,25 +2849,25 @@ class UniversityRegistrationBot:
                     parse_mode='Markdown'
                 )
             else:
-                await query.edit_message_text("❌ Failed to remove group data.")
+                self.edit_in_background(query, "❌ Failed to remove group data.")
             return
         
         # Handle dev remove registration callbacks
         if data.startswith("dev_remove_reg_group_"):
-            group_id = int(data.replace("dev_remove_reg_group_", ""))
+            group_id = int(data.removeprefix("dev_remove_reg_group_"))
             user_id = query.from_user.id
             if not queue_manager.is_dev(user_id):
                 await query.edit_message_text("❌ Access denied. Dev privileges required.")
                 return
             
             # Show courses in this group with registrations
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
+            group_name = queue_manager.get_group_view(group_id).name
             group_courses = queue_manager.get_group_courses(group_id)
+            group_queues = queue_manager.group_queues.get(group_id, _NO_QUEUES)
             
             keyboard = []
             for course_id, course_name in group_courses.items():
-                queue = queue_manager.group_queues[group_id].get(course_id, [])
+                queue = group_queues.get(course_id, ())
                 if queue:
                     keyboard.append([InlineKeyboardButton(
                         f"{course_name} ({len(queue)} registrations)",
@@ -2124,7 +2890,7 @@ class UniversityRegistrationBot:
             return
         
         if data.startswith("dev_remove_reg_course_"):
-            parts = data.replace("dev_remove_reg_course_", "").split("_", 1)
+            parts = data.removeprefix("dev_remove_reg_course_").split("_", 1)
             if len(parts) != 2:
                 await query.edit_message_text("❌ Invalid callback data.")
                 return
@@ -2140,7 +2906,7 @@ class UniversityRegistrationBot:
             # Show registrations for this course
             group_courses = queue_manager.get_group_courses(group_id)
             course_name = group_courses.get(course_id, course_id)
-            queue = queue_manager.group_queues[group_id].get(course_id, [])
+            queue = queue_manager.get_queue(group_id, course_id)
             
             if not queue:
                 await query.edit_message_text(f"📋 No registrations found for {course_name}.")
@@ -2148,9 +2914,9 @@ class UniversityRegistrationBot:
             
             keyboard = []
             for i, entry in enumerate(queue):
-                reg_time = datetime.fromisoformat(entry['registered_at']).strftime("%d.%m %H:%M")
-                registered_by = entry['username'] if entry['username'] != "Unknown" else f"User {entry['user_id']}"
-                button_text = f"{entry['full_name']} (by @{registered_by}) - {reg_time}"
+                reg_time = _format_registered_at(entry.registered_at, "%d.%m %H:%M")
+                registered_by = entry.username if entry.username != "Unknown" else f"User {entry.user_id}"
+                button_text = f"{entry.full_name} (by @{registered_by}) - {reg_time}"
                 keyboard.append([InlineKeyboardButton(
                     button_text,
                     callback_data=f"dev_confirm_remove_reg_{group_id}_{course_id}_{i}"
@@ -2169,270 +2935,45 @@ class UniversityRegistrationBot:
             )
             return
         
-        if data.startswith("dev_confirm_remove_reg_"):
-            parts = data.replace("dev_confirm_remove_reg_", "").split("_")
-            if len(parts) != 3:
-                await query.edit_message_text("❌ Invalid callback data.")
-                return
-            
-            group_id = int(parts[0])
-            course_id = parts[1]
-            entry_index = int(parts[2])
-            user_id = query.from_user.id
-            
-            if not queue_manager.is_dev(user_id):
-                await query.edit_message_text("❌ Access denied. Dev privileges required.")
-                return
-            
-            # Remove the registration
-            group_courses = queue_manager.get_group_courses(group_id)
-            course_name = group_courses.get(course_id, course_id)
-            queue = queue_manager.group_queues[group_id].get(course_id, [])
-            
-            if entry_index >= len(queue):
-                await query.edit_message_text("❌ Invalid registration index.")
-                return
-            
-            removed_entry = queue[entry_index]
-            queue_manager.group_queues[group_id][course_id].pop(entry_index)
-            
-            # Update positions
-            for i, entry in enumerate(queue_manager.group_queues[group_id][course_id]):
-                entry['position'] = i + 1
-            
-            queue_manager.save_data()
-            
-            await query.edit_message_text(
-                f"✅ **Registration Removed**\n\n"
-                f"**Course:** {course_name}\n"
-                f"**Removed:** {removed_entry['full_name']}\n"
-                f"**Registered by:** @{removed_entry['username']}\n"
-                f"**Remaining registrations:** {len(queue_manager.group_queues[group_id][course_id])}",
-                parse_mode='Markdown'
-            )
-            return
-        
-        if data.startswith("select_group_"):
-            # Handle group selection
-            selected_group_id = int(data.replace("select_group_", ""))
-            user_id = user.id
-            
-            # Validate group exists
-            if selected_group_id not in queue_manager.groups:
-                await query.edit_message_text("❌ Выбранная группа не найдена!")
-                return
-            
-            # Associate user with selected group
-            await self.associate_user_with_group(user_id, selected_group_id)
-            
-            # Show success message
-            group_info = queue_manager.groups[selected_group_id]
-            group_name = group_info.get('name', f'Group {selected_group_id}')
-            course_count = len(queue_manager.get_group_courses(selected_group_id))
-            
-            success_message = f"""✅ **Успешно подключены к группе!**
-
-📍 **Группа:** {group_name}
-📚 **Курсов доступно:** {course_count}
-
-🎯 **Что дальше:**
-• `/list` - Просмотр доступных курсов и расписаний
-• `/register` - Запись на открытые курсы
-• `/status` - Проверка текущих очередей
-
-Добро пожаловать! 🎓"""
-            
-            await query.edit_message_text(success_message, parse_mode='Markdown')
-            return
-        
-        # Handle register_courses_ BEFORE register_ to avoid conflict
-        if data.startswith("register_courses_"):
-            # This will be processed later with other group management callbacks
-            pass
-        elif data.startswith("register_"):
-            course_id = data.replace("register_", "")
-            
-            # Get user's associated group
-            user_id = query.from_user.id
-            associated_group = queue_manager.get_user_group(user_id)
-            
-            # Use associated group if no group context from chat
-            if not group_id:
-                group_id = associated_group
-            
-            # Validate group context
-            if not group_id:
-                audit_event(
-                    "register_course_click_blocked_no_group",
-                    user_id=user_id,
-                    username=query.from_user.username,
-                    course_id=course_id,
-                    update_id=getattr(update, 'update_id', None),
-                )
-                await query.edit_message_text("❌ Группа не найдена! Повторите попытку после взаимодействия с ботом в группе курса.")
-                return
-            
-            # Validate course exists in this group
-            group_courses = queue_manager.get_group_courses(group_id)
-            if course_id not in group_courses:
-                audit_event(
-                    "register_course_click_blocked_invalid_course",
-                    user_id=user_id,
-                    username=query.from_user.username,
-                    group_id=group_id,
-                    course_id=course_id,
-                    update_id=getattr(update, 'update_id', None),
-                )
-                await query.edit_message_text(f"❌ Недопустимый курс для этой группы! (group_id: {group_id}, course_id: {course_id})")
-                return
-            
-            # Ask for full name
-            course_name = group_courses[course_id]
-            audit_event(
-                "register_course_clicked",
-                user_id=user_id,
-                username=query.from_user.username,
-                group_id=group_id,
-                course_id=course_id,
-                course_name=course_name,
-                update_id=getattr(update, 'update_id', None),
-            )
-            self.track_activity(
-                'register_course_click',
-                user_id,
-                username=query.from_user.username,
-                group_id=group_id,
-                course_id=course_id,
-                source='callback_query',
-                update_id=getattr(update, 'update_id', None),
-            )
-            await query.edit_message_text(
-                f"📝 Вы выбрали: **{course_name}**\n\n"
-                "Ответьте с полным именем для записи:\n"
-                "💡 *Вы можете записать себя или друзей*\n"
-                "⚠️ *Каждое имя может быть записано только один раз на курс*",
-                parse_mode='Markdown'
-            )
-            
-            # Store course and group selection in user data
-            context.user_data['selected_course'] = course_id
-            context.user_data['selected_group'] = group_id
-            context.user_data['awaiting_name'] = True
-            return
-        
-        if data.startswith("status_"):
-            if not group_id:
-                await query.edit_message_text("❌ Группа не найдена!")
-                return
-                
-            if data == "status_all":
-                # Show summary of all courses for this group
-                await self.show_all_courses_summary(query, group_id)
-            else:
-                # Show detailed status for specific course
-                course_id = data.replace("status_", "")
-                await self.show_course_detailed_status(query, group_id, course_id)
-            return
-        
-        if data.startswith("unregister_"):
-            course_id = data.replace("unregister_", "")
-            user_id = user.id
-            
-            # Validate group context
-            if not group_id:
-                await query.edit_message_text("❌ Группа не найдена! Сначала взаимодействуйте с ботом в группе курса.")
-                return
-            
-            # Validate that the course exists in the group
-            group_courses = queue_manager.get_group_courses(group_id)
-            if not group_courses or course_id not in group_courses:
-                await query.edit_message_text("❌ Курс не найден в вашей группе!")
-                return
-            
-            # Get all registrations for this user in this course in this group
-            user_entries = [entry for entry in queue_manager.group_queues[group_id][course_id] 
-                          if entry['user_id'] == user_id]
-            
-            if not user_entries:
-                group_courses = queue_manager.get_group_courses(group_id)
-                course_name = group_courses.get(course_id, course_id)
-                await query.edit_message_text(
-                    f"❌ Вы не записаны на {course_name}."
-                )
-                return
-            
-            if len(user_entries) == 1:
-                # Only one registration, remove it directly
-                await self.remove_registration(query, group_id, course_id, 0)  # Index 0 for single entry
-                return
-            else:
-                # Multiple registrations, show selection
-                await self.show_registration_selection(query, group_id, course_id, user_entries)
-                return
-        
-        # Handle course removal selection (must be before general remove_ handler)
-        if data.startswith("remove_course_"):
-            parts = data.replace("remove_course_", "").split("_", 1)
-            if len(parts) == 2:
-                group_id, course_id = int(parts[0]), parts[1]
-                await self.handle_remove_course_callback(query, group_id, course_id, context)
-            else:
-                # Legacy format support (no group_id) - find group from course_id and chat context
-                course_id = data.replace("remove_course_", "")
-                
-                # Get group_id from chat context
-                chat_id = query.message.chat_id
-                chat_type = query.message.chat.type
-                
-                if chat_type in [Chat.GROUP, Chat.SUPERGROUP]:
-                    target_group_id = chat_id
-                else:
-                    # For private chats, find the group that contains this course
-                    target_group_id = None
-                    for gid, group_data in queue_manager.groups.items():
-                        if course_id in group_data.get('courses', {}):
-                            target_group_id = gid
-                            break
-                
-                if target_group_id:
-                    await self.handle_remove_course_callback(query, target_group_id, course_id, context)
-                else:
-                    await query.edit_message_text("❌ Course not found or access denied!")
-                    await query.answer()
-            return
-        
-        if data.startswith("remove_"):
-            # Format: remove_{course_id}_{index}
-            parts = data.replace("remove_", "").split("_")
-            if len(parts) >= 2:
-                # Join all parts except the last one (which should be the index)
-                course_id = "_".join(parts[:-1])
-                try:
-                    entry_index = int(parts[-1])
-                    if not group_id:
-                        await query.edit_message_text("❌ Группа не найдена!")
-                        return
-                    await self.remove_registration(query, group_id, course_id, entry_index)
-                    return
-                except ValueError:
-                    logger.error(f"Invalid entry index in callback data: {data}")
-                    await query.answer("Invalid data format")
-                    return
-            else:
-                logger.error(f"Invalid remove callback format: {data}")
-                await query.answer("Invalid data format")
+        if data.startswith("dev_confirm_remove_reg_"):
+            # Format: {group_id}_{course_id}_{index}; course ids may contain underscores
+            group_id_text, _, rest = data.removeprefix("dev_confirm_remove_reg_").partition("_")
+            course_id, sep, index_text = rest.rpartition("_")
+            if not sep:
+                await query.edit_message_text("❌ Invalid callback data.")
                 return
-
-        if data == "back_to_status":
-            # Recreate the status selection menu
-            if not group_id:
-                await query.edit_message_text("❌ Группа не найдена!")
+            
+            group_id = int(group_id_text)
+            entry_index = int(index_text)
+            user_id = query.from_user.id
+            
+            if not queue_manager.is_dev(user_id):
+                await query.edit_message_text("❌ Access denied. Dev privileges required.")
                 return
-            await self.show_status_selection_menu(query, group_id)
+            
+            # Remove the registration
+            group_courses = queue_manager.get_group_courses(group_id)
+            course_name = group_courses.get(course_id, course_id)
+            queue = queue_manager.get_queue(group_id, course_id)
+            
+            if entry_index >= len(queue):
+                await query.edit_message_text("❌ Invalid registration index.")
+                return
+            
+            removed_entry = queue_manager.remove_queue_entry(group_id, course_id, entry_index)
+            
+            await query.edit_message_text(
+                f"✅ **Registration Removed**\n\n"
+                f"**Course:** {course_name}\n"
+                f"**Removed:** {removed_entry.full_name}\n"
+                f"**Registered by:** @{removed_entry.username}\n"
+                f"**Remaining registrations:** {queue_manager.get_queue_size(group_id, course_id)}",
+                parse_mode='Markdown'
+            )
             return
-
+        
         if data.startswith("admin_swap_group_"):
-            group_id = int(data.replace("admin_swap_group_", ""))
+            group_id = int(data.removeprefix("admin_swap_group_"))
             user_id = query.from_user.id
             
             # Check if user still has admin access to this group
@@ -2452,34 +2993,21 @@ class UniversityRegistrationBot:
             return
 
         if data.startswith("admin_swap_"):
-            course_id = data.replace("admin_swap_", "")
+            course_id = data.removeprefix("admin_swap_")
             await self.show_swap_interface(query, course_id, context)
             return
 
         # Handle admin group selection for opening courses
         if data.startswith("admin_open_group_"):
-            group_id = int(data.replace("admin_open_group_", ""))
+            group_id = int(data.removeprefix("admin_open_group_"))
             group_courses = queue_manager.get_group_courses(group_id)
             if not group_courses:
                 await query.edit_message_text("❌ No courses found in this group!")
                 return
             
-            keyboard = []
-            for course_id, course_name in group_courses.items():
-                is_open = queue_manager.is_course_registration_open(group_id, course_id)
-                status = "🟢" if is_open else "🔴"
-                keyboard.append([InlineKeyboardButton(
-                    f"{course_name} {status}", 
-                    callback_data=f"admin_open_course_{group_id}_{course_id}"
-                )])
-            
-            # Add option to open all courses in this group
-            keyboard.append([InlineKeyboardButton("🟢 Open ALL in Group", callback_data=f"admin_open_all_{group_id}")])
-            keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="cancel")])
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = self.build_admin_course_menu('open', group_id)
             
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
+            group_name = queue_manager.get_group_view(group_id).name
             await query.edit_message_text(
                 f"🟢 **Open Registration - {group_name}**\n\n"
                 f"Select a course to open:",
@@ -2490,28 +3018,15 @@ class UniversityRegistrationBot:
 
         # Handle admin group selection for closing courses
         if data.startswith("admin_close_group_"):
-            group_id = int(data.replace("admin_close_group_", ""))
+            group_id = int(data.removeprefix("admin_close_group_"))
             group_courses = queue_manager.get_group_courses(group_id)
             if not group_courses:
                 await query.edit_message_text("❌ No courses found in this group!")
                 return
             
-            keyboard = []
-            for course_id, course_name in group_courses.items():
-                is_open = queue_manager.is_course_registration_open(group_id, course_id)
-                status = "🟢" if is_open else "🔴"
-                keyboard.append([InlineKeyboardButton(
-                    f"{course_name} {status}", 
-                    callback_data=f"admin_close_course_{group_id}_{course_id}"
-                )])
-            
-            # Add option to close all courses in this group
-            keyboard.append([InlineKeyboardButton("🔴 Close ALL in Group", callback_data=f"admin_close_all_{group_id}")])
-            keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="cancel")])
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = self.build_admin_course_menu('close', group_id)
             
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
+            group_name = queue_manager.get_group_view(group_id).name
             await query.edit_message_text(
                 f"🔴 **Close Registration - {group_name}**\n\n"
                 f"Select a course to close:",
@@ -2522,26 +3037,15 @@ class UniversityRegistrationBot:
 
         # Handle admin group selection for removing courses
         if data.startswith("admin_remove_group_"):
-            group_id = int(data.replace("admin_remove_group_", ""))
+            group_id = int(data.removeprefix("admin_remove_group_"))
             group_courses = queue_manager.get_group_courses(group_id)
             if not group_courses:
                 await query.edit_message_text("❌ No courses found in this group!")
                 return
             
-            keyboard = []
-            for course_id, course_name in group_courses.items():
-                queue_size = len(queue_manager.group_queues.get(group_id, {}).get(course_id, []))
-                status_text = f" ({queue_size} registered)" if queue_size > 0 else ""
-                keyboard.append([InlineKeyboardButton(
-                    f"🗑️ {course_name}{status_text}",
-                    callback_data=f"remove_course_{group_id}_{course_id}"
-                )])
-            
-            keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="cancel")])
-            reply_markup = InlineKeyboardMarkup(keyboard)
+            reply_markup = self.build_admin_course_menu('remove', group_id)
             
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
+            group_name = queue_manager.get_group_view(group_id).name
             await query.edit_message_text(
                 f"🗑️ <b>Remove Course - {group_name}</b>\n\n"
                 f"⚠️ <b>Warning</b>: This will permanently delete the course and all its data.\n"
@@ -2554,41 +3058,21 @@ class UniversityRegistrationBot:
 
         # Handle admin group selection for clearing queues
         if data.startswith("admin_clear_group_"):
-            logger.info(f"admin_clear_group callback received: {data}")
-            group_id = int(data.replace("admin_clear_group_", ""))
+            logger.debug("admin_clear_group callback received: %s", data)
+            group_id = int(data.removeprefix("admin_clear_group_"))
             group_courses = queue_manager.get_group_courses(group_id)
-            logger.info(f"Found {len(group_courses)} courses in group {group_id}")
+            logger.debug("Found %d courses in group %s", len(group_courses), group_id)
             if not group_courses:
                 await query.edit_message_text("❌ No courses found in this group!")
                 return
             
-            # Build keyboard for courses with non-empty queues in this group
-            keyboard = []
-            total_registered = 0
-            has_queues = False
-            
-            for course_id, course_name in group_courses.items():
-                queue = queue_manager.group_queues.get(group_id, {}).get(course_id, [])
-                if queue:
-                    has_queues = True
-                    queue_size = len(queue)
-                    total_registered += queue_size
-                    keyboard.append([InlineKeyboardButton(
-                        f"🗑️ Clear {course_name} ({queue_size} registered)", 
-                        callback_data=f"admin_clear_{group_id}_{course_id}"
-                    )])
-            
-            if not has_queues:
+            # Keyboard lists only courses with non-empty queues in this group
+            reply_markup = self.build_admin_course_menu('clear', group_id)
+            if reply_markup is None:
                 await query.edit_message_text("📭 All queues in this group are already empty!")
                 return
             
-            # Add option to clear all queues in this group
-            keyboard.append([InlineKeyboardButton(f"🗑️ Clear All Queues ({total_registered} total)", callback_data=f"admin_clear_all_confirm_{group_id}")])
-            keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="cancel")])
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
+            group_name = queue_manager.get_group_view(group_id).name
             await query.edit_message_text(
                 f"🗑️ **Clear Queues - {group_name}**\n\n"
                 f"Select a queue to clear:",
@@ -2600,43 +3084,41 @@ class UniversityRegistrationBot:
         # Handle admin group selection for status viewing
         if data.startswith("admin_status_group_"):
             try:
-                group_id = int(data.replace("admin_status_group_", ""))
-                logger.info(f"Admin status callback for group_id: {group_id} (type: {type(group_id)})")
+                group_id = int(data.removeprefix("admin_status_group_"))
+                logger.debug("Admin status callback for group_id: %s", group_id)
                 
                 group_courses = queue_manager.get_group_courses(group_id)
-                logger.info(f"Found {len(group_courses)} courses for group {group_id}")
+                logger.debug("Found %d courses for group %s", len(group_courses), group_id)
                 
                 if not group_courses:
                     await query.edit_message_text("❌ No courses found in this group!")
                     return
                 
                 # Build detailed status for this group
-                group_info = queue_manager.groups.get(group_id, {})
-                group_name = group_info.get('name', f'Group {group_id}')
-                status_text = f"📊 <b>Detailed Queue Status - {group_name}</b>\n\n"
+                group_name = queue_manager.get_group_view(group_id).name.translate(HTML_ESCAPE_TABLE)
+                parts = [f"📊 <b>Detailed Queue Status - {group_name}</b>\n\n"]
                 
                 total_registered = 0
+                group_queues = queue_manager.group_queues.get(group_id, _NO_QUEUES)
                 for course_id, course_name in group_courses.items():
-                    queue = queue_manager.group_queues.get(group_id, {}).get(course_id, [])
+                    queue = group_queues.get(course_id, ())
                     total_registered += len(queue)
-                    logger.info(f"Course {course_id}: {len(queue)} registrations")
-                    status_text += f"📚 <b>{course_name}</b> ({len(queue)} registered):\n"
+                    parts.append(f"📚 <b>{course_name.translate(HTML_ESCAPE_TABLE)}</b> ({len(queue)} registered):\n")
                     
                     if queue:
                         for i, entry in enumerate(queue, 1):
-                            reg_time = datetime.fromisoformat(entry['registered_at']).strftime("%H:%M:%S")
-                            logger.info(f"Processing entry {i}: full_name='{entry['full_name']}', username='{entry['username']}'")
+                            reg_time = _format_registered_at(entry.registered_at, "%H:%M:%S")
                             # Escape HTML characters in user data
-                            full_name = entry['full_name'].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                            username = entry['username'].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                            status_text += f"  {i}. {full_name} (@{username}) - {reg_time}\n"
+                            full_name = entry.full_name.translate(HTML_ESCAPE_TABLE)
+                            username = entry.username.translate(HTML_ESCAPE_TABLE)
+                            parts.append(f"  {i}. {full_name} (@{username}) - {reg_time}\n")
                     else:
-                        status_text += "  No registrations\n"
-                    status_text += "\n"
+                        parts.append("  No registrations\n")
+                    parts.append("\n")
                 
-                status_text += f"<b>Total registrations in group: {total_registered}</b>"
+                parts.append(f"<b>Total registrations in group: {total_registered}</b>")
                 
-                await query.edit_message_text(status_text, parse_mode='HTML')
+                await query.edit_message_text("".join(parts), parse_mode='HTML')
                 return
                 
             except Exception as e:
@@ -2646,7 +3128,7 @@ class UniversityRegistrationBot:
 
         # Handle admin group selection for adding courses
         if data.startswith("admin_add_course_group_"):
-            group_id = int(data.replace("admin_add_course_group_", ""))
+            group_id = int(data.removeprefix("admin_add_course_group_"))
             
             # Check if user has admin access to this group
             if not queue_manager.has_admin_access(user_id, group_id):
@@ -2656,8 +3138,7 @@ class UniversityRegistrationBot:
             # Start the add course conversation with group context
             self.set_user_state(user_id, 'add_course_id', {'group_id': group_id})
             
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
+            group_name = queue_manager.get_group_view(group_id).name
             
             await query.edit_message_text(
                 f"➕ **Добавить новый курс**\n\n"
@@ -2670,7 +3151,7 @@ class UniversityRegistrationBot:
 
         # Handle opening specific courses
         if data.startswith("admin_open_course_"):
-            parts = data.replace("admin_open_course_", "").split("_", 1)
+            parts = data.removeprefix("admin_open_course_").split("_", 1)
             if len(parts) == 2:
                 group_id, course_id = int(parts[0]), parts[1]
                 group_courses = queue_manager.get_group_courses(group_id)
@@ -2678,8 +3159,7 @@ class UniversityRegistrationBot:
                     queue_manager.set_course_registration_status(group_id, course_id, True)
                     queue_manager.auto_register_if_enabled(group_id, course_id)
                     course_name = group_courses[course_id]
-                    group_info = queue_manager.groups.get(group_id, {})
-                    group_name = group_info.get('name', f'Group {group_id}')
+                    group_name = queue_manager.get_group_view(group_id).name
                     await query.edit_message_text(f"✅ Registration opened for {course_name} in {group_name}!")
                 else:
                     await query.edit_message_text("❌ Course not found!")
@@ -2687,15 +3167,14 @@ class UniversityRegistrationBot:
 
         # Handle closing specific courses
         if data.startswith("admin_close_course_"):
-            parts = data.replace("admin_close_course_", "").split("_", 1)
+            parts = data.removeprefix("admin_close_course_").split("_", 1)
             if len(parts) == 2:
                 group_id, course_id = int(parts[0]), parts[1]
                 group_courses = queue_manager.get_group_courses(group_id)
                 if course_id in group_courses:
                     queue_manager.set_course_registration_status(group_id, course_id, False)
                     course_name = group_courses[course_id]
-                    group_info = queue_manager.groups.get(group_id, {})
-                    group_name = group_info.get('name', f'Group {group_id}')
+                    group_name = queue_manager.get_group_view(group_id).name
                     await query.edit_message_text(f"🔒 Registration closed for {course_name} in {group_name}!")
                 else:
                     await query.edit_message_text("❌ Course not found!")
@@ -2703,30 +3182,24 @@ class UniversityRegistrationBot:
 
         # Handle opening all courses in a group
         if data.startswith("admin_open_all_"):
-            group_id = int(data.replace("admin_open_all_", ""))
+            group_id = int(data.removeprefix("admin_open_all_"))
             group_courses = queue_manager.get_group_courses(group_id)
-            count = 0
+            count = len(group_courses)
+            queue_manager.open_registration(group_id)
             for course_id in group_courses:
-                queue_manager.set_course_registration_status(group_id, course_id, True)
                 queue_manager.auto_register_if_enabled(group_id, course_id)
-                count += 1
 
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
+            group_name = queue_manager.get_group_view(group_id).name
             await query.edit_message_text(f"✅ Registration opened for ALL {count} courses in {group_name}!")
             return
 
         # Handle closing all courses in a group  
         if data.startswith("admin_close_all_"):
-            group_id = int(data.replace("admin_close_all_", ""))
-            group_courses = queue_manager.get_group_courses(group_id)
-            count = 0
-            for course_id in group_courses:
-                queue_manager.set_course_registration_status(group_id, course_id, False)
-                count += 1
+            group_id = int(data.removeprefix("admin_close_all_"))
+            count = len(queue_manager.get_group_courses(group_id))
+            queue_manager.close_registration(group_id)
             
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
+            group_name = queue_manager.get_group_view(group_id).name
             await query.edit_message_text(f"🔒 Registration closed for ALL {count} courses in {group_name}!")
             return
 
@@ -2738,7 +3211,7 @@ class UniversityRegistrationBot:
                 await self.notify_registration_open(context)
             else:
                 # Open specific course
-                course_id = data.replace("admin_open_", "")
+                course_id = data.removeprefix("admin_open_")
                 if course_id in queue_manager.courses:
                     queue_manager.open_course_registration(course_id)
                     course_name = queue_manager.courses[course_id]
@@ -2752,7 +3225,7 @@ class UniversityRegistrationBot:
                 await query.edit_message_text("🔒 Registration closed for ALL courses!")
             else:
                 # Close specific course
-                course_id = data.replace("admin_close_", "")
+                course_id = data.removeprefix("admin_close_")
                 if course_id in queue_manager.courses:
                     queue_manager.close_course_registration(course_id)
                     course_name = queue_manager.courses[course_id]
@@ -2761,19 +3234,19 @@ class UniversityRegistrationBot:
         
         # Handle add course day selection
         if data.startswith("add_day_"):
-            day = int(data.replace("add_day_", ""))
+            day = int(data.removeprefix("add_day_"))
             await self.handle_add_course_day_callback(query, day, context)
             return
         
         # Handle course removal confirmation
         if data.startswith("confirm_remove_"):
-            parts = data.replace("confirm_remove_", "").split("_", 1)
+            parts = data.removeprefix("confirm_remove_").split("_", 1)
             if len(parts) == 2:
                 group_id, course_id = int(parts[0]), parts[1]
                 await self.handle_confirm_remove_callback(query, group_id, course_id, context)
             else:
                 # Legacy format support (no group_id) - find group from course_id and chat context
-                course_id = data.replace("confirm_remove_", "")
+                course_id = data.removeprefix("confirm_remove_")
                 
                 # Get group_id from chat context
                 chat_id = query.message.chat_id
@@ -2783,11 +3256,7 @@ class UniversityRegistrationBot:
                     target_group_id = chat_id
                 else:
                     # For private chats, find the group that contains this course
-                    target_group_id = None
-                    for gid, group_data in queue_manager.groups.items():
-                        if course_id in group_data.get('courses', {}):
-                            target_group_id = gid
-                            break
+                    target_group_id = queue_manager.find_course_group(course_id)
                 
                 if target_group_id:
                     await self.handle_confirm_remove_callback(query, target_group_id, course_id, context)
@@ -2800,17 +3269,11 @@ class UniversityRegistrationBot:
         if data.startswith("admin_clear_"):
             if data.startswith("admin_clear_all_confirm_"):
                 # Clear all queues in specific group
-                group_id = int(data.replace("admin_clear_all_confirm_", ""))
-                group_courses = queue_manager.get_group_courses(group_id)
-                total_cleared = 0
+                group_id = int(data.removeprefix("admin_clear_all_confirm_"))
+                total_cleared = queue_manager.count_group_registrations(group_id)
+                queue_manager.clear_queues(group_id)
                 
-                for course_id in group_courses:
-                    queue = queue_manager.group_queues.get(group_id, {}).get(course_id, [])
-                    total_cleared += len(queue)
-                    queue_manager.clear_course_queue(group_id, course_id)
-                
-                group_info = queue_manager.groups.get(group_id, {})
-                group_name = group_info.get('name', f'Group {group_id}')
+                group_name = queue_manager.get_group_view(group_id).name
                 await query.edit_message_text(f"🗑️ All queues cleared in {group_name}! ({total_cleared} registrations removed)")
             elif data == "dev_clearQ_all_confirm":
                 # Global clear: Clear all queues in all groups
@@ -2825,12 +3288,7 @@ class UniversityRegistrationBot:
                 
                 for group_id, group_info in queue_manager.groups.items():
                     group_name = group_info.get('name', f'Group {group_id}')
-                    group_courses = queue_manager.get_group_courses(group_id)
-                    group_cleared = 0
-                    
-                    for course_id in group_courses:
-                        queue = queue_manager.group_queues.get(group_id, {}).get(course_id, [])
-                        group_cleared += len(queue)
+                    group_cleared = queue_manager.count_group_registrations(group_id)
                     
                     if group_cleared > 0:
                         queue_manager.clear_queues(group_id)
@@ -2859,32 +3317,27 @@ class UniversityRegistrationBot:
                 return
             else:
                 # Clear specific course - new format: admin_clear_group_id_course_id
-                parts = data.replace("admin_clear_", "").split("_", 1)
+                parts = data.removeprefix("admin_clear_").split("_", 1)
                 if len(parts) == 2:
                     group_id, course_id = int(parts[0]), parts[1]
                     group_courses = queue_manager.get_group_courses(group_id)
                     if course_id in group_courses:
                         course_name = group_courses[course_id]
-                        queue_count = len(queue_manager.group_queues.get(group_id, {}).get(course_id, []))
+                        queue_count = queue_manager.get_queue_size(group_id, course_id)
                         queue_manager.clear_course_queue(group_id, course_id)
-                        group_info = queue_manager.groups.get(group_id, {})
-                        group_name = group_info.get('name', f'Group {group_id}')
+                        group_name = queue_manager.get_group_view(group_id).name
                         await query.edit_message_text(f"🗑️ Queue cleared for {course_name} in {group_name}! ({queue_count} registrations removed)")
                     else:
                         await query.edit_message_text("❌ Course not found in this group!")
                 else:
                     # Legacy format support (no group_id) - should not be used in multi-group setup
-                    course_id = data.replace("admin_clear_", "")
+                    course_id = data.removeprefix("admin_clear_")
                     # Find which group this course belongs to
-                    target_group_id = None
-                    for gid, group_data in queue_manager.groups.items():
-                        if course_id in group_data.get('courses', {}):
-                            target_group_id = gid
-                            break
+                    target_group_id = queue_manager.find_course_group(course_id)
                     
                     if target_group_id and queue_manager.has_admin_access(user_id, target_group_id):
-                        course_name = queue_manager.groups[target_group_id]['courses'][course_id]['name']
-                        queue_count = len(queue_manager.group_queues.get(target_group_id, {}).get(course_id, []))
+                        course_name = queue_manager.group_courses[target_group_id][course_id]
+                        queue_count = queue_manager.get_queue_size(target_group_id, course_id)
                         queue_manager.clear_course_queue(target_group_id, course_id)
                         await query.edit_message_text(f"🗑️ Queue cleared for {course_name}! ({queue_count} registrations removed)")
                     else:
@@ -2901,10 +3354,9 @@ class UniversityRegistrationBot:
             
             try:
                 # Parse callback data: queuesize_group_id_new_size
-                parts = data.replace("queuesize_", "").split("_")
-                if len(parts) >= 2:
-                    group_id_str = "_".join(parts[:-1])  # Handle negative group IDs
-                    new_size = int(parts[-1])
+                group_id_str, sep, size_text = data.removeprefix("queuesize_").rpartition("_")
+                if sep:
+                    new_size = int(size_text)
                     group_id = int(group_id_str)
                     
                     # Verify admin access to this specific group
@@ -2945,10 +3397,9 @@ class UniversityRegistrationBot:
             
             try:
                 # Parse callback data: dev_queuesize_group_id_new_size
-                parts = data.replace("dev_queuesize_", "").split("_")
-                if len(parts) >= 2:
-                    group_id_str = "_".join(parts[:-1])  # Handle negative group IDs
-                    new_size = int(parts[-1])
+                group_id_str, sep, size_text = data.removeprefix("dev_queuesize_").rpartition("_")
+                if sep:
+                    new_size = int(size_text)
                     group_id = int(group_id_str)
                     
                     # Set the queue size (dev can modify any group)
@@ -2973,36 +3424,6 @@ class UniversityRegistrationBot:
             
             await query.answer()
             return
-        
-        # Handle group management callbacks
-        if data == "switch_group":
-            await self.handle_switch_group_callback(query, context)
-            return
-        
-        if data.startswith("view_courses_"):
-            group_id = int(data.replace("view_courses_", ""))
-            await self.handle_view_courses_callback(query, group_id, context)
-            return
-            
-        if data.startswith("register_courses_"):
-            group_id = int(data.replace("register_courses_", ""))
-            await self.handle_register_courses_callback(query, group_id, context)
-            return
-            
-        if data.startswith("help_"):
-            group_id = int(data.replace("help_", ""))
-            await self.handle_help_callback(query, group_id, context)
-            return
-            
-        if data.startswith("confirm_switch_"):
-            new_group_id = int(data.replace("confirm_switch_", ""))
-            await self.handle_confirm_switch_callback(query, new_group_id, context)
-            return
-            
-        if data.startswith("back_to_menu_"):
-            group_id = int(data.replace("back_to_menu_", ""))
-            await self.handle_back_to_menu_callback(query, group_id, context)
-            return
     
     async def message_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle text messages (for name input, admin swap positions, and add course conversation)"""
@@ -3012,8 +3433,10 @@ class UniversityRegistrationBot:
         # Set up personalized commands for first-time users or when permissions might have changed
         await self.setup_user_commands(user_id)
         
+        text = update.message.text
+        
         # Handle cancel command
-        if update.message.text.strip().lower() in ['/cancel', 'cancel']:
+        if text.strip().lower() in _CANCEL_TOKENS:
             if user_id in self.user_states:
                 self.clear_user_state(user_id)
                 await update.message.reply_text("❌ Операция отменена.")
@@ -3022,14 +3445,17 @@ class UniversityRegistrationBot:
             await update.message.reply_text("❌ Операция отменена.")
             return
         
+        # Most messages are not part of a conversation, so peek at the state without building a placeholder
+        user_state = self.user_states.get(user_id)
+        state = user_state.state if user_state is not None else None
+        
         # Check for add course conversation
-        user_state = self.get_user_state(user_id)
-        if user_state.get('state') in ['add_course_id', 'add_course_name', 'add_course_time']:
+        if state in _ADD_COURSE_STATES:
             await self.handle_add_course_conversation(update, context)
             return
         
         # Check for dev add admin conversation
-        if user_state.get('state') == 'dev_add_admin':
+        if state == 'dev_add_admin':
             await self.handle_dev_add_admin_conversation(update, context)
             return
         
@@ -3041,7 +3467,7 @@ class UniversityRegistrationBot:
                 context.user_data.clear()
                 return
             
-            await self.process_swap_positions(update, context, update.message.text)
+            await self.process_swap_positions(update, context, text)
             return
         
         # Handle name input for registration
@@ -3054,7 +3480,7 @@ class UniversityRegistrationBot:
             return
         
         user = update.effective_user
-        full_name = update.message.text.strip()
+        full_name = text.strip()
         course_id = context.user_data.get('selected_course')
         selected_group_id = context.user_data.get('selected_group')
         update_id = getattr(update, 'update_id', None)
@@ -3161,32 +3587,7 @@ class UniversityRegistrationBot:
             return
         
         # Show group selection first (filter by admin access)
-        keyboard = []
-        logger.info(f"Checking groups for admin_open. Total groups: {len(queue_manager.groups)}")
-        for group_id, group_info in queue_manager.groups.items():
-            # Check if user has admin access to this group (convert group_id to int)
-            try:
-                group_id_int = int(group_id)
-            except (ValueError, TypeError):
-                logger.warning(f"Could not convert group_id {group_id} to int")
-                continue
-                
-            logger.info(f"Checking access for user {user_id} to group {group_id_int}")
-            if queue_manager.has_admin_access(user_id, group_id_int):
-                logger.info(f"User {user_id} has admin access to group {group_id_int}")
-                group_name = group_info.get('name', f'Group {group_id}')
-                group_courses = queue_manager.get_group_courses(group_id_int)
-                course_count = len(group_courses)
-                logger.info(f"Group {group_id_int} ({group_name}) has {course_count} courses: {list(group_courses.keys())}")
-                keyboard.append([InlineKeyboardButton(
-                    f"{group_name} ({course_count} courses)", 
-                    callback_data=f"admin_open_group_{group_id_int}"
-                )])
-            else:
-                logger.info(f"User {user_id} does NOT have admin access to group {group_id_int}")
-        
-        keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="cancel")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = self.build_admin_group_menu('open', queue_manager.get_managed_group_ids(user_id))
         
         await update.message.reply_text(
             "🟢 **Open Course Registration**\n\n"
@@ -3205,34 +3606,7 @@ class UniversityRegistrationBot:
             return
         
         # Show group selection first (filter by admin access)
-        keyboard = []
-        logger.info(f"Checking groups for admin_close. Total groups: {len(queue_manager.groups)}")
-        for group_id, group_info in queue_manager.groups.items():
-            # Check if user has admin access to this group (convert group_id to int)
-            try:
-                group_id_int = int(group_id)
-            except (ValueError, TypeError):
-                logger.warning(f"Could not convert group_id {group_id} to int")
-                continue
-                
-            logger.info(f"Checking access for user {user_id} to group {group_id_int}")
-            if queue_manager.has_admin_access(user_id, group_id_int):
-                logger.info(f"User {user_id} has admin access to group {group_id_int}")
-                group_name = group_info.get('name', f'Group {group_id}')
-                group_courses = queue_manager.get_group_courses(group_id_int)
-                course_count = len(group_courses)
-                logger.info(f"Group {group_id_int} ({group_name}) has {course_count} courses: {list(group_courses.keys())}")
-                keyboard.append([InlineKeyboardButton(
-                    f"{group_name} ({course_count} courses)", 
-                    callback_data=f"admin_close_group_{group_id_int}"
-                )])
-            else:
-                logger.info(f"User {user_id} does NOT have admin access to group {group_id_int}")
-        
-        # Add option to close all courses
-        keyboard.append([InlineKeyboardButton("🔴 Close ALL Courses", callback_data="admin_close_all")])
-        keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="cancel")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = self.build_admin_group_menu('close', queue_manager.get_managed_group_ids(user_id))
         
         await update.message.reply_text(
             "� **Close Course Registration**\n\n"
@@ -3251,53 +3625,12 @@ class UniversityRegistrationBot:
             await update.message.reply_text("❌ Access denied. Admin privileges required.")
             return
 
-        # Show group selection first (filter by admin access)
-        keyboard = []
-        total_registered = 0
-        has_queues = False
-        
-        logger.info(f"Checking groups for admin_clear. Total groups: {len(queue_manager.groups)}")
-        
-        for group_id, group_info in queue_manager.groups.items():
-            # Check if user has admin access to this group (convert group_id to int)
-            try:
-                group_id_int = int(group_id)
-            except (ValueError, TypeError):
-                continue
-                
-            if queue_manager.has_admin_access(user_id, group_id_int):
-                logger.info(f"User {user_id} has admin access to group {group_id}")
-                group_name = group_info.get('name', f'Group {group_id}')
-                
-                # Count non-empty queues in this group
-                group_queue_count = 0
-                group_courses = queue_manager.group_courses.get(group_id, {})
-                logger.info(f"Group {group_id} has {len(group_courses)} courses: {list(group_courses.keys())}")
-                
-                for course_id in group_courses:
-                    queue = queue_manager.group_queues.get(group_id, {}).get(course_id, [])
-                    logger.info(f"  Course {course_id} in group {group_id}: {len(queue)} registrations")
-                    logger.info(f"    Queue lookup: queue_manager.group_queues.get('{group_id}', {{}}).get('{course_id}', [])")
-                    logger.info(f"    Available group_queues keys: {list(queue_manager.group_queues.keys())}")
-                    group_queue_count += len(queue)
-                    total_registered += len(queue)
-                
-                logger.info(f"Group {group_id} total queue count: {group_queue_count}")
-                
-                if group_queue_count > 0:
-                    has_queues = True
-                    keyboard.append([InlineKeyboardButton(
-                        f"{group_name} ({group_queue_count} total registrations)", 
-                        callback_data=f"admin_clear_group_{group_id}"
-                    )])
-
-        if not has_queues:
+        # Show group selection first (filter by admin access), listing only groups with registrations
+        reply_markup = self.build_admin_group_menu('clear', queue_manager.get_managed_group_ids(user_id))
+        if reply_markup is None:
             await update.message.reply_text("� All queues are already empty!")
             return
 
-        keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="cancel")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await update.message.reply_text(
             "🗑️ **Clear Course Queues**\n\n"
             "Select a group to manage:",
@@ -3319,12 +3652,7 @@ class UniversityRegistrationBot:
         
         for group_id, group_info in queue_manager.groups.items():
             group_name = group_info.get('name', f'Group {group_id}')
-            group_registrations = 0
-            
-            group_courses = queue_manager.get_group_courses(group_id)
-            for course_id in group_courses:
-                queue = queue_manager.group_queues.get(group_id, {}).get(course_id, [])
-                group_registrations += len(queue)
+            group_registrations = queue_manager.count_group_registrations(group_id)
             
             if group_registrations > 0:
                 groups_with_data += 1
@@ -3368,38 +3696,10 @@ class UniversityRegistrationBot:
             return
         
         # Show group selection first (filter by admin access)
-        keyboard = []
-        total_registered = 0
-        
-        for group_id, group_info in queue_manager.groups.items():
-            # Check if user has admin access to this group (convert group_id to int)
-            try:
-                group_id_int = int(group_id)
-            except (ValueError, TypeError):
-                continue
-                
-            if queue_manager.has_admin_access(user_id, group_id_int):
-                group_name = group_info.get('name', f'Group {group_id}')
-                
-                # Count total registrations in this group
-                group_queue_count = 0
-                group_courses = queue_manager.group_courses.get(group_id, {})
-                for course_id in group_courses:
-                    queue = queue_manager.group_queues.get(group_id, {}).get(course_id, [])
-                    group_queue_count += len(queue)
-                    
-                total_registered += group_queue_count
-                keyboard.append([InlineKeyboardButton(
-                    f"{group_name} ({group_queue_count} total registrations)", 
-                    callback_data=f"admin_status_group_{group_id}"
-                )])
-
-        if not keyboard:
+        reply_markup = self.build_admin_group_menu('status', queue_manager.get_managed_group_ids(user_id))
+        if reply_markup is None:
             await update.message.reply_text("❌ No groups found or no admin access!")
             return
-
-        keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="cancel")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
         
         await update.message.reply_text(
             "📊 **Detailed Queue Status**\n\n"
@@ -3417,103 +3717,82 @@ class UniversityRegistrationBot:
             await update.message.reply_text("❌ Access denied. Admin privileges required.")
             return
         
-        config_text = "⚙️ **Bot Configuration**\n\n"
+        parts = ["⚙️ **Bot Configuration**\n\n"]
         
         # If user is a dev, show all groups; if group admin, show only their groups
         if queue_manager.is_dev(user_id):
             admin_groups = list(queue_manager.groups.keys())
-            config_text += "**🔧 Developer View - All Groups**\n\n"
+            parts.append("**🔧 Developer View - All Groups**\n\n")
         else:
             admin_groups = queue_manager.get_admin_groups(user_id)
             if not admin_groups:
                 await update.message.reply_text("❌ No groups found for your admin access.")
                 return
-            config_text += "**👥 Group Admin View**\n\n"
+            parts.append("**👥 Group Admin View**\n\n")
         
         # Show courses for admin's groups only
         total_courses = 0
         open_courses = 0
-        day_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
         
+        # admin_groups always holds int ids, matching groups/group_courses/group_schedules keys
         for group_id in admin_groups:
-            # Convert string group_id to int for proper data access
-            group_id_int = int(group_id) if isinstance(group_id, str) else group_id
-            
-            # Use the integer group ID for lookup since groups dict uses integer keys
-            group_info = queue_manager.groups.get(group_id_int, {})
-            
-            if isinstance(group_info, dict):
-                group_name = group_info.get('name', f'Group - {group_id}')
-                # Get courses from the correct data structures
-                group_courses_names = queue_manager.group_courses.get(group_id_int, {})
-                group_schedules = queue_manager.group_schedules.get(group_id_int, {})
-            else:
-                group_name = f'Group - {group_id}'
-                group_courses_names = {}
-                group_schedules = {}
+            group_name = queue_manager.get_group_view(group_id).name
+            group_courses_names = queue_manager.group_courses.get(group_id, {})
+            group_schedules = queue_manager.group_schedules.get(group_id, {})
+            group_statuses = queue_manager.get_group_course_statuses(group_id)
             
             if group_courses_names:
-                config_text += f"**📚 Courses in {group_name}:**\n"
+                parts.append(f"**📚 Courses in {group_name}:**\n")
                 for course_id, course_name in group_courses_names.items():
-                    status = queue_manager.get_course_registration_status_compat(course_id)
-                    schedule = group_schedules.get(course_id, {"day": 2, "time": "20:00"})
-                    day_name = day_names[schedule.get('day', 2)]
+                    is_open = group_statuses.get(course_id, False)
+                    status = STATUS_OPEN_LABEL if is_open else STATUS_CLOSED_LABEL
+                    schedule = group_schedules.get(course_id, DEFAULT_SCHEDULE)
+                    day_name = DAY_NAMES_SHORT[schedule.get('day', 2)]
                     time_str = schedule.get('time', '20:00')
-                    config_text += f"  • `{course_id}` → {course_name} {status}\n"
-                    config_text += f"    📅 Schedule: {day_name} {time_str}\n"
+                    parts.append(f"  • `{course_id}` → {course_name} {status}\n    📅 Schedule: {day_name} {time_str}\n")
                     total_courses += 1
-                    if queue_manager.is_course_registration_open_compat(course_id):
-                        open_courses += 1
-                config_text += "\n"
+                    open_courses += is_open
+                parts.append("\n")
         
         # Show group admins for admin's groups only
-        config_text += f"**👑 Group Admins:**\n"
+        parts.append("**👑 Group Admins:**\n")
+        # Resolve every listed admin's name in one concurrent batch (group_admins uses string keys)
+        group_admin_ids = {group_id: queue_manager.group_admins.get(str(group_id), []) for group_id in admin_groups}
+        unique_admin_ids = list(dict.fromkeys(admin_id for admin_ids in group_admin_ids.values() for admin_id in admin_ids))
+        admin_names = dict(zip(unique_admin_ids, await self.get_user_display_names(unique_admin_ids)))
         for group_id in admin_groups:
-            # Convert to int for groups lookup, but use string for group_admins lookup
-            group_id_int = int(group_id) if isinstance(group_id, str) else group_id
-            
-            group_info = queue_manager.groups.get(group_id_int, {})
-            if isinstance(group_info, dict):
-                group_name = group_info.get('name', f'Group - {group_id}')
-            else:
-                group_name = f'Group - {group_id}'
-            
-            admin_ids = queue_manager.group_admins.get(group_id, [])  # group_admins uses string keys
+            group_name = queue_manager.get_group_view(group_id).name
+            admin_ids = group_admin_ids[group_id]
             
             if admin_ids:
-                config_text += f"  • **{group_name}**:\n"
+                parts.append(f"  • **{group_name}**:\n")
                 for admin_id in admin_ids:
-                    admin_name = await self.get_user_display_name(admin_id)
-                    config_text += f"    - {admin_name}\n"
+                    parts.append(f"    - {admin_names[admin_id]}\n")
             else:
-                config_text += f"  • **{group_name}**: No admins configured\n"
+                parts.append(f"  • **{group_name}**: No admins configured\n")
         
         # Settings summary
-        config_text += f"\n**⚙️ Settings:**\n"
+        parts.append("\n**⚙️ Settings:**\n")
         # Show queue sizes for admin's groups
         for group_id in admin_groups:
-            group_id_int = int(group_id) if isinstance(group_id, str) else group_id
-            group_info = queue_manager.groups.get(group_id_int, {})
-            if isinstance(group_info, dict):
-                group_name = group_info.get('name', f'Group - {group_id}')
-            else:
-                group_name = f'Group - {group_id}'
-            queue_size = queue_manager.get_group_queue_size(group_id_int)
-            config_text += f"  • **{group_name}** queue size: {queue_size}\n"
+            queue_size = queue_manager.get_group_queue_size(group_id)
+            parts.append(f"  • **{queue_manager.get_group_view(group_id).name}** queue size: {queue_size}\n")
             
         if total_courses > 0:
-            config_text += f"  • Registration Status: {open_courses}/{total_courses} courses open\n"
+            parts.append(f"  • Registration Status: {open_courses}/{total_courses} courses open\n")
         else:
-            config_text += f"  • No courses configured in your groups\n"
+            parts.append("  • No courses configured in your groups\n")
         
-        await update.message.reply_text(config_text, parse_mode='Markdown')
+        await update.message.reply_text("".join(parts), parse_mode='Markdown')
     
     async def admin_queuesize_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Admin: Set queue size for group"""
         user_id = update.effective_user.id
         
-        # Check admin access
-        if not queue_manager.has_admin_access(user_id):
+        # Resolve admin access once; devs and legacy admins may manage any group
+        admin_groups = queue_manager.get_admin_groups(user_id)
+        has_global_access = queue_manager.is_dev(user_id) or queue_manager.is_admin(user_id)
+        if not has_global_access and not any(gid in queue_manager.groups for gid in admin_groups):
             await update.message.reply_text("❌ Access denied. Admin privileges required.")
             return
         
@@ -3546,14 +3825,13 @@ class UniversityRegistrationBot:
         
         # If in a group, check if user has admin access to that specific group
         if group_id:
-            if not queue_manager.has_admin_access(user_id, group_id):
+            if not has_global_access and group_id not in admin_groups:
                 await update.message.reply_text("❌ You don't have admin access to this group.")
                 return
             
             # Set queue size for this specific group
             if queue_manager.set_group_queue_size(group_id, new_size):
-                group_info = queue_manager.groups.get(group_id, {})
-                group_name = group_info.get('name', f'Group {group_id}')
+                group_name = queue_manager.get_group_view(group_id).name
                 await update.message.reply_text(
                     f"✅ **Queue size updated successfully!**\n\n"
                     f"**Group:** {group_name}\n"
@@ -3565,26 +3843,23 @@ class UniversityRegistrationBot:
                 await update.message.reply_text("❌ Failed to update queue size.")
         else:
             # Private message - need to select which group
-            admin_groups = queue_manager.get_admin_groups(user_id)
             if not admin_groups:
                 await update.message.reply_text("❌ No groups found for your admin access.")
                 return
             
             if len(admin_groups) == 1:
                 # Only one group, set it directly
-                group_id_str = admin_groups[0]
-                group_id_int = int(group_id_str) if isinstance(group_id_str, str) else group_id_str
+                group_id = admin_groups[0]
                 
-                if queue_manager.set_group_queue_size(group_id_int, new_size):
-                    group_info = queue_manager.groups.get(group_id_int, {})
-                    group_name = group_info.get('name', f'Group {group_id_str}')
+                if queue_manager.set_group_queue_size(group_id, new_size):
+                    group_name = queue_manager.get_group_view(group_id).name
                     await update.message.reply_text(
                         f"✅ **Queue size updated successfully!**\n\n"
                         f"**Group:** {group_name}\n"
                         f"**New queue size:** {new_size}",
                         parse_mode='Markdown'
                     )
-                    logger.info(f"Queue size for group {group_id_int} ({group_name}) set to {new_size} by user {user_id}")
+                    logger.info(f"Queue size for group {group_id} ({group_name}) set to {new_size} by user {user_id}")
                 else:
                     await update.message.reply_text("❌ Failed to update queue size.")
             else:
@@ -3634,8 +3909,7 @@ class UniversityRegistrationBot:
         # If in a group, set queue size for that group
         if group_id:
             if queue_manager.set_group_queue_size(group_id, new_size):
-                group_info = queue_manager.groups.get(group_id, {})
-                group_name = group_info.get('name', f'Group {group_id}')
+                group_name = queue_manager.get_group_view(group_id).name
                 await update.message.reply_text(
                     f"✅ **Queue size updated successfully!**\n\n"
                     f"**Group:** {group_name}\n"
@@ -3656,8 +3930,7 @@ class UniversityRegistrationBot:
                 group_id_int = next(iter(queue_manager.groups.keys()))
                 
                 if queue_manager.set_group_queue_size(group_id_int, new_size):
-                    group_info = queue_manager.groups.get(group_id_int, {})
-                    group_name = group_info.get('name', f'Group {group_id_int}')
+                    group_name = queue_manager.get_group_view(group_id_int).name
                     await update.message.reply_text(
                         f"✅ **Queue size updated successfully!**\n\n"
                         f"**Group:** {group_name}\n"
@@ -3694,16 +3967,12 @@ class UniversityRegistrationBot:
         """Admin: Swap positions in queue"""
         user_id = update.effective_user.id
         
-        # Debug logging
         logger.info(f"admin_swap_command called by user {user_id}")
-        logger.info(f"User {user_id} - is_dev: {queue_manager.is_dev(user_id)}, is_admin: {queue_manager.is_admin(user_id)}")
-        logger.info(f"User {user_id} - has_admin_access (no group): {queue_manager.has_admin_access(user_id)}")
         
         # Determine group context
         if update.message.chat.type in ['group', 'supergroup']:
             group_id = update.message.chat.id
-            logger.info(f"admin_swap_command in group {group_id}")
-            logger.info(f"User {user_id} - has_admin_access (group {group_id}): {queue_manager.has_admin_access(user_id, group_id)}")
+            logger.debug("admin_swap_command in group %s", group_id)
             # Check if user has admin access to this specific group
             if not queue_manager.has_admin_access(user_id, group_id):
                 await update.message.reply_text("❌ Доступ запрещён. У вас нет прав администратора в этой группе.")
@@ -3711,7 +3980,7 @@ class UniversityRegistrationBot:
             await self.show_swap_courses_for_group(update, group_id)
         else:
             # Private chat - show group selection first
-            logger.info(f"admin_swap_command in private chat")
+            logger.debug("admin_swap_command in private chat")
             if not queue_manager.has_admin_access(user_id):
                 logger.info(f"User {user_id} does not have admin access - denying")
                 await update.message.reply_text("❌ Доступ запрещён. Требуются права администратора.")
@@ -3722,25 +3991,11 @@ class UniversityRegistrationBot:
                 return
             
             keyboard = []
-            for group_id, group_info in queue_manager.groups.items():
-                # Check if user has admin access to this group
-                logger.info(f"Checking admin access for user {user_id} to group {group_id} (type: {type(group_id)})")
-                # Convert group_id to int for consistent checking
-                try:
-                    group_id_int = int(group_id)
-                except (ValueError, TypeError):
-                    logger.error(f"Cannot convert group_id {group_id} to int")
-                    continue
-                    
-                if queue_manager.has_admin_access(user_id, group_id_int):
-                    logger.info(f"User {user_id} has access to group {group_id_int}")
-                    group_name = group_info.get('name', f'Group {group_id}')
-                    keyboard.append([InlineKeyboardButton(
-                        f"{group_name}", 
-                        callback_data=f"admin_swap_group_{group_id}"
-                    )])
-                else:
-                    logger.info(f"User {user_id} does NOT have access to group {group_id_int}")
+            for group_id in queue_manager.get_managed_group_ids(user_id):
+                keyboard.append([InlineKeyboardButton(
+                    queue_manager.get_group_view(group_id).name, 
+                    callback_data=f"admin_swap_group_{group_id}"
+                )])
             
             if not keyboard:
                 logger.info(f"User {user_id} has no admin rights to any group")
@@ -3768,10 +4023,10 @@ class UniversityRegistrationBot:
                 await update.message.reply_text("В этой группе нет настроенных курсов.")
             return
         
+        group_queues = queue_manager.group_queues.get(group_id, _NO_QUEUES)
         keyboard = []
         for course_id, course_name in group_courses.items():
-            queue_entries = queue_manager.group_queues[group_id][course_id]
-            queue_size = len(queue_entries)
+            queue_size = len(group_queues.get(course_id, ()))
             if queue_size < 2:
                 # Skip courses with less than 2 registrations
                 continue
@@ -3825,8 +4080,8 @@ class UniversityRegistrationBot:
             # Try to get from user state
             user_id = query.from_user.id
             user_state = self.user_states.get(user_id)
-            if user_state and user_state.get('state') == 'swap_group_selected':
-                group_id = user_state.get('data', {}).get('group_id')
+            if user_state and user_state.state == 'swap_group_selected':
+                group_id = user_state.data.get('group_id')
         
         if not group_id:
             await query.edit_message_text("❌ Ошибка: Информация о группе потеряна. Попробуйте снова.")
@@ -3838,7 +4093,7 @@ class UniversityRegistrationBot:
             await query.edit_message_text("❌ Курс не найден в этой группе.")
             return
             
-        queue_entries = queue_manager.group_queues[group_id][course_id]
+        queue_entries = queue_manager.get_queue(group_id, course_id)
         
         if len(queue_entries) < 2:
             await query.edit_message_text("В этом курсе недостаточно записей для обмена (минимум 2).")
@@ -3849,7 +4104,7 @@ class UniversityRegistrationBot:
         message += "**Текущая очередь:**\n"
         
         for i, entry in enumerate(queue_entries, 1):
-            message += f"{i:2d}. {entry['full_name']}\n"
+            message += f"{i:2d}. {entry.full_name}\n"
         
         message += f"\n**Инструкции:**\n"
         message += f"Ответьте двумя номерами позиций для обмена (например, '3 5' для обмена позиций 3 и 5)\n"
@@ -3902,7 +4157,7 @@ class UniversityRegistrationBot:
             return
         
         # Validate positions
-        queue_entries = queue_manager.group_queues[group_id][course_id]
+        queue_entries = queue_manager.get_queue(group_id, course_id)
         if pos1 < 1 or pos1 > len(queue_entries) or pos2 < 1 or pos2 > len(queue_entries):
             await update.message.reply_text(f"❌ Номера позиций должны быть от 1 до {len(queue_entries)}.")
             return
@@ -3914,57 +4169,45 @@ class UniversityRegistrationBot:
         # Perform the swap
         group_courses = queue_manager.get_group_courses(group_id)
         course_name = group_courses.get(course_id, course_id)
-        entry1 = queue_entries[pos1 - 1].copy()
-        entry2 = queue_entries[pos2 - 1].copy()
-        
-        # Swap the entries
-        queue_entries[pos1 - 1] = entry2
-        queue_entries[pos2 - 1] = entry1
-        
-        # Update positions in the entries
-        queue_entries[pos1 - 1]['position'] = pos1
-        queue_entries[pos2 - 1]['position'] = pos2
+        entry1 = queue_entries[pos1 - 1]
+        entry2 = queue_entries[pos2 - 1]
         
-        # Save changes
-        queue_manager.save_data()
+        # Swap the entries (reindexes and saves)
+        queue_manager.swap_queue_entries(group_id, course_id, pos1 - 1, pos2 - 1)
         
         # Show success message with new queue in Russian
         message = f"✅ **Обмен завершён - {course_name}**\n\n"
         message += f"**Обменены:**\n"
-        message += f"Позиция {pos1}: {entry2['full_name']}\n"
-        message += f"Позиция {pos2}: {entry1['full_name']}\n\n"
+        message += f"Позиция {pos1}: {entry2.full_name}\n"
+        message += f"Позиция {pos2}: {entry1.full_name}\n\n"
         message += f"**Обновлённая очередь:**\n"
         
         for i, entry in enumerate(queue_entries, 1):
             swap_marker = ""
             if i == pos1 or i == pos2:
                 swap_marker = " 🔄"
-            message += f"{i:2d}. {entry['full_name']}{swap_marker}\n"
+            message += f"{i:2d}. {entry.full_name}{swap_marker}\n"
         
         # Clear user data
         context.user_data.clear()
         
         await update.message.reply_text(message, parse_mode='Markdown')
         
-        # Update positions in the entries
-        queue_entries[pos1 - 1]['position'] = pos1
-        queue_entries[pos2 - 1]['position'] = pos2
-        
         # Save changes using the new group-based structure
-        queue_manager.save_data()
+        queue_manager.mark_data_dirty()
         
         # Show success message with new queue
         message = f"✅ **Swap Completed - {course_name}**\n\n"
         message += f"**Swapped:**\n"
-        message += f"Position {pos1}: {entry1['full_name']}\n"
-        message += f"Position {pos2}: {entry2['full_name']}\n\n"
+        message += f"Position {pos1}: {entry1.full_name}\n"
+        message += f"Position {pos2}: {entry2.full_name}\n\n"
         message += f"**Updated Queue:**\n"
         
         for i, entry in enumerate(queue_entries, 1):
             swap_marker = ""
             if i == pos1 or i == pos2:
                 swap_marker = " 🔄"
-            message += f"{i:2d}. {entry['full_name']}{swap_marker}\n"
+            message += f"{i:2d}. {entry.full_name}{swap_marker}\n"
         
         # Clear user data
         context.user_data.clear()
@@ -4064,8 +4307,8 @@ class UniversityRegistrationBot:
         # Show dev users
         if queue_manager.dev_users:
             message_text += "🔥 **Dev Users (Global Access):**\n"
-            for dev_user in queue_manager.dev_users:
-                dev_name = await self.get_user_display_name(dev_user)
+            dev_names = await self.get_user_display_names(queue_manager.dev_users)
+            for dev_user, dev_name in zip(queue_manager.dev_users, dev_names):
                 message_text += f"• {dev_name} (`{dev_user}`)\n"
             message_text += "\n"
         
@@ -4075,15 +4318,14 @@ class UniversityRegistrationBot:
             # Convert string group_id to int to match groups dictionary
             try:
                 group_id = int(group_id_str)
-                group_info = queue_manager.groups.get(group_id, {})
-                group_name = group_info.get('name', f'Group {group_id}')
+                group_name = queue_manager.get_group_view(group_id).name
             except (ValueError, TypeError):
                 group_name = f'Group {group_id_str}'
                 
             if admin_list:
                 message_text += f"**{group_name}:**\n"
-                for admin_user in admin_list:
-                    admin_name = await self.get_user_display_name(admin_user)
+                admin_names = await self.get_user_display_names(admin_list)
+                for admin_user, admin_name in zip(admin_list, admin_names):
                     message_text += f"  • {admin_name} (`{admin_user}`)\n"
             else:
                 message_text += f"**{group_name}:** No admins\n"
@@ -4104,8 +4346,7 @@ class UniversityRegistrationBot:
                 # Convert string group_id to int to match groups dictionary
                 try:
                     group_id = int(group_id_str)
-                    group_info = queue_manager.groups.get(group_id, {})
-                    group_name = group_info.get('name', f'Group {group_id}')
+                    group_name = queue_manager.get_group_view(group_id).name
                 except (ValueError, TypeError):
                     group_name = f'Group {group_id_str}'
                     
@@ -4141,22 +4382,16 @@ class UniversityRegistrationBot:
         stale_groups = []
         active_groups = []
         
-        # Check each group
-        for group_id, group_info in queue_manager.groups.items():
+        # Check all groups concurrently
+        groups = list(queue_manager.groups.items())
+        membership = await queue_manager.check_bot_in_groups(self.application.bot, [group_id for group_id, _ in groups])
+        for group_id, group_info in groups:
             group_name = group_info.get('name', f'Group {group_id}')
-            # Convert group_id to int for the API call
-            try:
-                group_id_int = int(group_id)
-                is_member = await queue_manager.check_bot_in_group(self.application.bot, group_id_int)
-            except (ValueError, TypeError):
-                logger.error(f"Invalid group_id format: {group_id}")
-                is_member = False
-            
-            if is_member:
+            if membership[group_id]:
                 active_groups.append((group_id, group_name))
             else:
                 course_count = len(queue_manager.group_courses.get(group_id, {}))
-                queue_count = sum(len(q) for q in queue_manager.group_queues.get(group_id, {}).values())
+                queue_count = queue_manager.count_group_registrations(group_id)
                 stale_groups.append((group_id, group_name, course_count, queue_count))
         
         if not stale_groups:
@@ -4323,13 +4558,10 @@ class UniversityRegistrationBot:
             return
         
         message = f"🚫 **Blacklisted Users ({len(blacklist)}):**\n\n"
-        for bl_user_id in blacklist:
-            # Try to get user info
-            try:
-                user_name = await self.get_user_display_name(bl_user_id)
-                message += f"• {user_name} (ID: `{bl_user_id}`)\n"
-            except:
-                message += f"• User ID: `{bl_user_id}`\n"
+        # get_user_display_name falls back to "User <id>" itself, so no per-user error handling is needed
+        user_names = await self.get_user_display_names(blacklist)
+        for bl_user_id, user_name in zip(blacklist, user_names):
+            message += f"• {user_name} (ID: `{bl_user_id}`)\n"
         
         message += f"\n💡 *Use /dev_blacklist_remove <user_id> to remove a user from the blacklist*"
         
@@ -4367,9 +4599,7 @@ class UniversityRegistrationBot:
         keyboard = []
         for group_id, group_info in queue_manager.groups.items():
             group_name = group_info.get('name', f'Group {group_id}')
-            group_courses = queue_manager.get_group_courses(group_id)
-            total_registrations = sum(len(queue_manager.group_queues[group_id].get(course_id, [])) 
-                                     for course_id in group_courses)
+            total_registrations = queue_manager.count_group_registrations(group_id)
             
             if total_registrations > 0:
                 keyboard.append([InlineKeyboardButton(
@@ -4434,8 +4664,8 @@ class UniversityRegistrationBot:
         """Handle multi-step add course conversation"""
         user_id = update.effective_user.id
         user_state = self.get_user_state(user_id)
-        state = user_state.get('state')
-        data = user_state.get('data', {})
+        state = user_state.state
+        data = user_state.data
         
         if state == 'add_course_id':
             # Step 1: Get course ID
@@ -4498,7 +4728,7 @@ class UniversityRegistrationBot:
             
             # Validate time format
             try:
-                time_obj = datetime.strptime(time_text, "%H:%M").time()
+                _parse_hhmm(time_text)
             except ValueError:
                 await update.message.reply_text(
                     "❌ Неверный формат времени. Пожалуйста, используйте формат ЧЧ:ММ (например, '18:00', '09:30'):"
@@ -4508,8 +4738,7 @@ class UniversityRegistrationBot:
             data['time'] = time_text
             
             # Confirm and create course
-            day_names = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье']
-            day_name = day_names[data['day']]
+            day_name = DAY_NAMES_RU[data['day']]
             
             # Get group_id from the original message context or user's associated group
             group_id = data.get('group_id')
@@ -4555,7 +4784,7 @@ class UniversityRegistrationBot:
         """Handle dev add admin conversation"""
         user_id = update.effective_user.id
         user_state = self.get_user_state(user_id)
-        data = user_state.get('data', {})
+        data = user_state.data
         group_id = data.get('group_id')
         
         if not queue_manager.is_dev(user_id):
@@ -4574,27 +4803,15 @@ class UniversityRegistrationBot:
             )
             return
         
-        # Check if user is already admin of this group (use string key)
-        group_id_str = str(group_id)
-        if new_admin_id in queue_manager.group_admins.get(group_id_str, []):
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
+        # Add admin to group; permissions apply in memory right away
+        if not queue_manager.add_group_admin(group_id, new_admin_id):
+            group_name = queue_manager.get_group_view(group_id).name
             await update.message.reply_text(f"ℹ️ User {new_admin_id} is already an admin of {group_name}.")
             self.clear_user_state(user_id)
             return
+        await queue_manager.flush_pending()
         
-        # Add admin to group (use string key for consistency)
-        if group_id_str not in queue_manager.group_admins:
-            queue_manager.group_admins[group_id_str] = []
-        queue_manager.group_admins[group_id_str].append(new_admin_id)
-        queue_manager.save_config()
-        
-        # Reload admin config to ensure permissions are immediately available
-        queue_manager.reload_admin_config()
-        
-        # Convert int group_id to match groups dictionary (group_id is int here)
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
+        group_name = queue_manager.get_group_view(group_id).name
         admin_name = await self.get_user_display_name(new_admin_id)
         
         # Update command suggestions for the newly added admin
@@ -4616,16 +4833,15 @@ class UniversityRegistrationBot:
         user_id = query.from_user.id
         user_state = self.get_user_state(user_id)
         
-        if user_state.get('state') != 'add_course_day':
+        if user_state.state != 'add_course_day':
             await query.answer("Invalid state")
             return
         
-        data = user_state.get('data', {})
+        data = user_state.data
         data['day'] = day
         self.set_user_state(user_id, 'add_course_time', data)
         
-        day_names = ['Понедельник', 'Вторник', 'Среда', 'Четверг', 'Пятница', 'Суббота', 'Воскресенье']
-        day_name = day_names[day]
+        day_name = DAY_NAMES_RU[day]
         
         await query.edit_message_text(
             f"✅ ID курса: `{data['course_id']}`\n"
@@ -4653,10 +4869,9 @@ class UniversityRegistrationBot:
         course_name = group_courses[course_id]
         
         # Check if course has registrations
-        queue_size = len(queue_manager.group_queues.get(group_id, {}).get(course_id, []))
+        queue_size = queue_manager.get_queue_size(group_id, course_id)
         if queue_size > 0:
-            group_info = queue_manager.groups.get(group_id, {})
-            group_name = group_info.get('name', f'Group {group_id}')
+            group_name = queue_manager.get_group_view(group_id).name
             await query.edit_message_text(
                 f"❌ <b>Cannot Remove Course</b>\n\n"
                 f"Course '{course_name}' in {group_name} has {queue_size} registered students.\n"
@@ -4674,9 +4889,8 @@ class UniversityRegistrationBot:
         reply_markup = InlineKeyboardMarkup(keyboard)
         
         # Get schedule from group schedules
-        schedule = queue_manager.group_schedules.get(group_id, {}).get(course_id, {"day": 2, "time": "20:00"})
-        day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_name = day_names[schedule['day']]
+        schedule = queue_manager.group_schedules.get(group_id, {}).get(course_id, DEFAULT_SCHEDULE)
+        day_name = DAY_NAMES[schedule['day']]
         
         await query.edit_message_text(
             f"⚠️ <b>Confirm Course Removal</b>\n\n"
@@ -4724,12 +4938,11 @@ class UniversityRegistrationBot:
         next_openings = []
         
         for course_id, course_name in group_courses.items():
-            schedule = group_schedules.get(course_id, {"day": 2, "time": "20:00"})
+            schedule = group_schedules.get(course_id, DEFAULT_SCHEDULE)
             reg_day = schedule['day']
             reg_time_str = schedule['time']
             
-            reg_time_parts = reg_time_str.split(':')
-            reg_time = time(int(reg_time_parts[0]), int(reg_time_parts[1]))
+            reg_time = _parse_hhmm(reg_time_str)
             
             # Find next occurrence of this day at registration time
             days_ahead = reg_day - now.weekday()
@@ -4738,15 +4951,14 @@ class UniversityRegistrationBot:
             
             next_date = now.date() + timedelta(days=days_ahead)
             next_datetime = datetime.combine(next_date, reg_time)
-            next_datetime = TIMEZONE.localize(next_datetime)
+            next_datetime = next_datetime.replace(tzinfo=TIMEZONE)
             
             next_openings.append((next_datetime, course_name))
         
         # Get the earliest opening
         if next_openings:
             earliest = min(next_openings, key=lambda x: x[0])
-            days = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"]
-            day_name = days[earliest[0].weekday()]
+            day_name = DAY_NAMES_RU[earliest[0].weekday()]
             return f"{day_name}, {earliest[0].strftime('%d %B в %H:%M')}"
         
         return "Расписание не найдено"
@@ -4759,8 +4971,7 @@ class UniversityRegistrationBot:
         """Scheduled job to open registration for a specific course in a specific group"""
         group_courses = queue_manager.get_group_courses(group_id)
         course_name = group_courses.get(course_id, course_id)
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
+        group_name = queue_manager.get_group_view(group_id).name
         
         logger.info(f"Opening registration for {course_name} in {group_name} via scheduled job")
         queue_manager.open_course_registration(group_id, course_id)
@@ -4814,9 +5025,8 @@ class UniversityRegistrationBot:
                 schedule_time_str = schedule.get('time', '20:00')  # Default to 20:00
                 
                 try:
-                    time_parts = schedule_time_str.split(':')
-                    schedule_time = time(int(time_parts[0]), int(time_parts[1]))
-                except (ValueError, IndexError):
+                    schedule_time = _parse_hhmm(schedule_time_str)
+                except ValueError:
                     logger.warning(f"Invalid time format for {course_id} in group {group_id}, using default 20:00")
                     schedule_time = time(20, 0)
                 
@@ -4826,13 +5036,13 @@ class UniversityRegistrationBot:
                 if days_until_target == 0:  # Today
                     next_target_date = now.date()
                     next_reg_time = datetime.combine(next_target_date, schedule_time)
-                    next_reg_time = TIMEZONE.localize(next_reg_time)
+                    next_reg_time = next_reg_time.replace(tzinfo=TIMEZONE)
                     if next_reg_time <= now:  # Time has passed today
                         next_reg_time += timedelta(days=7)
                 else:
                     next_target_date = now + timedelta(days=days_until_target)
                     next_reg_time = datetime.combine(next_target_date.date(), schedule_time)
-                    next_reg_time = TIMEZONE.localize(next_reg_time)
+                    next_reg_time = next_reg_time.replace(tzinfo=TIMEZONE)
                 
                 # Schedule the job for this specific course in this group
                 job_queue.run_repeating(
@@ -4842,8 +5052,7 @@ class UniversityRegistrationBot:
                     name=f'registration_opener_{course_id}'
                 )
                 
-                day_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                day_name = day_names[schedule_day]
+                day_name = DAY_NAMES[schedule_day]
                 logger.info(f"Scheduled {course_name} registration opening: {day_name}s at {schedule_time_str} (next: {next_reg_time})")
     
     async def scheduled_open_course_registration(self, context: ContextTypes.DEFAULT_TYPE, group_id: str, course_id: str):
@@ -4876,16 +5085,9 @@ class UniversityRegistrationBot:
             notification_users.update(queue_manager.group_admins[str(group_id)])
         
         for admin_id in notification_users:
-            try:
-                await context.bot.send_message(
-                    chat_id=admin_id,
-                    text=message,
-                    parse_mode='Markdown'
-                )
-            except Exception as e:
-                logger.error(f"Failed to send notification to admin {admin_id}: {e}")
+            self.enqueue_message(admin_id, message, parse_mode='Markdown')
         
-        logger.info(f"Registration opened notification sent for {course_name}")
+        logger.info(f"Registration opened notification queued for {course_name} ({len(notification_users)} recipients)")
     
     # Legacy method for backward compatibility
     async def scheduled_open_registration(self, context: ContextTypes.DEFAULT_TYPE):
@@ -4996,11 +5198,7 @@ class UniversityRegistrationBot:
             return True
         
         # Check if user is admin in any group
-        for group_admins in queue_manager.group_admins.values():
-            if user_id in group_admins:
-                return True
-        
-        return False
+        return bool(queue_manager.get_admin_groups(user_id))
     
     def is_dev_user(self, user_id: int) -> bool:
         """Check if user is dev"""
@@ -5059,6 +5257,46 @@ class UniversityRegistrationBot:
         """Called after the bot has been initialized"""
         await self.setup_bot_commands()
         logger.info("Bot commands set up successfully")
+        self._sender_task = asyncio.create_task(self._message_sender(application.bot))
+    
+    async def post_shutdown(self, application: Application) -> None:
+        """Called on shutdown: write out any queue changes the flush job hasn't saved yet"""
+        if self._sender_task is not None:
+            self._sender_task.cancel()
+            if not self._send_queue.empty():
+                logger.warning(f"Dropping {self._send_queue.qsize()} unsent notifications on shutdown")
+        await queue_manager.shutdown()
+        logger.info("Queue data flushed on shutdown")
+    
+    def enqueue_message(self, chat_id: int, text: str, **kwargs):
+        """Queue a notification for the rate-limited sender instead of sending it inline"""
+        self._send_queue.put_nowait((chat_id, text, kwargs))
+    
+    async def _message_sender(self, bot):
+        """Send queued notifications one at a time, pacing sends and backing off on flood control"""
+        while True:
+            chat_id, text, kwargs = await self._send_queue.get()
+            try:
+                # Retry the same message after flood control so notifications keep their order
+                while True:
+                    try:
+                        await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                        break
+                    except RetryAfter as e:
+                        delay = e.retry_after
+                        if isinstance(delay, timedelta):
+                            delay = delay.total_seconds()
+                        logger.warning(f"Flood control hit, retrying message to {chat_id} in {delay}s")
+                        await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error(f"Failed to send notification to {chat_id}: {e}")
+            finally:
+                self._send_queue.task_done()
+            await asyncio.sleep(MESSAGE_SEND_INTERVAL)
+    
+    async def scheduled_flush(self, context: ContextTypes.DEFAULT_TYPE):
+        """Repeating job: persist queue data and config changed since the last run"""
+        await queue_manager.flush_pending()
     
     async def error_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle errors that occur in the bot"""
@@ -5089,6 +5327,7 @@ class UniversityRegistrationBot:
         self.application = (Application.builder()
                           .token(TELEGRAM_BOT_TOKEN)
                           .post_init(self.post_init)
+                          .post_shutdown(self.post_shutdown)
                           .connect_timeout(30)
                           .read_timeout(30)
                           .write_timeout(30)
@@ -5106,13 +5345,14 @@ class UniversityRegistrationBot:
         ))
         
         # Add handlers (English commands only)
+        # Read-only menus run with block=False so a slow reply doesn't hold up other chats' updates
         self.application.add_handler(CommandHandler("start", self.start_command))
         self.application.add_handler(CommandHandler("help", self.help_command))
-        self.application.add_handler(CommandHandler("list", self.list_command))
+        self.application.add_handler(CommandHandler("list", self.list_command, block=False))
         self.application.add_handler(CommandHandler("register", self.register_command))
-        self.application.add_handler(CommandHandler("unregister", self.unregister_command))
-        self.application.add_handler(CommandHandler("status", self.status_command))
-        self.application.add_handler(CommandHandler("myregistrations", self.my_registrations_command))
+        self.application.add_handler(CommandHandler("unregister", self.unregister_command, block=False))
+        self.application.add_handler(CommandHandler("status", self.status_command, block=False))
+        self.application.add_handler(CommandHandler("myregistrations", self.my_registrations_command, block=False))
         
         # Admin commands
         self.application.add_handler(CommandHandler("admin_open", self.admin_open_command))
@@ -5151,6 +5391,15 @@ class UniversityRegistrationBot:
         # Set up scheduler (if job queue is available)
         if self.application.job_queue is not None:
             self.setup_scheduler(self.application.job_queue)
+            
+            # Coalesce queue data and config writes: mutations mark them dirty, this job writes them out
+            self.application.job_queue.run_repeating(
+                self.scheduled_flush,
+                interval=DATA_FLUSH_INTERVAL,
+                first=DATA_FLUSH_INTERVAL,
+                name='state_flush'
+            )
+            queue_manager.defer_saves = True
         else:
             logger.warning("JobQueue not available. Scheduled registration opening disabled.")
             logger.info("Use /admin_open to manually open registration.")
@@ -5208,8 +5457,9 @@ class UniversityRegistrationBot:
         # Switch user to new group
         queue_manager.associate_user_with_group(user_id, new_group_id)
         
-        # IMPORTANT: Reload queue data from file to get fresh state
-        queue_manager.load_data()
+        # IMPORTANT: Reload queue data from file to get fresh state (flush pending changes first)
+        await queue_manager.flush_pending()
+        await queue_manager.load_data_async()
         
         # Get new group info
         new_group_info = queue_manager.groups.get(new_group_id, {})
@@ -5239,34 +5489,18 @@ class UniversityRegistrationBot:
             await query.edit_message_text("� В этой группе пока нет доступных курсов.")
             return
         
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
-        
-        message_text = f"📚 **Курсы в группе: {group_name}**\n\n"
-        
-        days = ["Понедельник", "Вторник", "Среда", "Четверг", "Пятница", "Суббота", "Воскресенье"]
-        group_schedules = queue_manager.get_group_schedules(group_id)
-        
-        for course_id, course_name in group_courses.items():
-            # Get schedule info
-            schedule_info = group_schedules.get(course_id, {"day": 2, "time": "20:00"})
-            day_name = days[schedule_info['day']]
-            time_str = schedule_info['time']
-            
-            # Get registration status
-            is_open = queue_manager.is_course_registration_open(group_id, course_id)
-            status_icon = "🟢" if is_open else "🔴"
-            status_text = "Открыто" if is_open else "Закрыто"
-            
-            # Get queue count
-            queue_count = len(queue_manager.group_queues[group_id].get(course_id, []))
-            
-            message_text += f"{status_icon} **{course_name}**\n"
-            message_text += f"   📅 {day_name} в {time_str}\n"
-            message_text += f"   📊 Статус очереди: {status_text}\n"
-            message_text += f"   👥 Записано: {queue_count}\n\n"
+        group_name = queue_manager.get_group_view(group_id).name
         
-        message_text += "📝 Нажмите \"Записаться на курсы\" для регистрации!"
+        parts = [f"📚 **Курсы в группе: {group_name}**\n\n"]
+        for course_id, course_name, schedule_info, is_open, queue_count in queue_manager.snapshot_group(group_id):
+            parts.append(
+                f"{'🟢' if is_open else '🔴'} **{course_name}**\n"
+                f"   📅 {DAY_NAMES_RU[schedule_info['day']]} в {schedule_info['time']}\n"
+                f"   📊 Статус очереди: {'Открыто' if is_open else 'Закрыто'}\n"
+                f"   👥 Записано: {queue_count}\n\n"
+            )
+        parts.append("📝 Нажмите \"Записаться на курсы\" для регистрации!")
+        message_text = "".join(parts)
         
         # Add back button to return to main menu
         keyboard = [
@@ -5295,25 +5529,16 @@ class UniversityRegistrationBot:
             return
         
         # Create inline keyboard with courses
+        snapshot = queue_manager.snapshot_group(group_id)
         keyboard = []
-        for course_id, course_name in group_courses.items():
-            # Check if registration is open
-            is_open = queue_manager.is_course_registration_open(group_id, course_id)
-            count = len(queue_manager.group_queues[group_id].get(course_id, []))
-            
-            if is_open:
-                status = "🟢"
-            else:
-                status = "🔴"
-            
-            button_text = f"{course_name} ({count}) {status}"
+        for course_id, course_name, _, is_open, count in snapshot:
+            button_text = f"{course_name} ({count}) {'🟢' if is_open else '🔴'}"
             keyboard.append([InlineKeyboardButton(button_text, callback_data=f"register_{course_id}")])
         
         keyboard.append([InlineKeyboardButton("❌ Отмена", callback_data="cancel")])
         reply_markup = InlineKeyboardMarkup(keyboard)
         
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
+        group_name = queue_manager.get_group_view(group_id).name
         
         message = (
             f"📝 **Регистрация на курсы - {group_name}**\n\n"
@@ -5328,7 +5553,7 @@ class UniversityRegistrationBot:
             username=query.from_user.username,
             group_id=group_id,
             group_name=group_name,
-            open_course_count=sum(1 for course_id in group_courses if queue_manager.is_course_registration_open(group_id, course_id)),
+            open_course_count=sum(1 for _, _, _, is_open, _ in snapshot if is_open),
             total_course_count=len(group_courses),
             source='group_menu_callback',
             update_id=update_id,
@@ -5347,8 +5572,7 @@ class UniversityRegistrationBot:
     async def handle_help_callback(self, query, group_id, context):
         """Handle help callback"""
         user_id = query.from_user.id
-        group_info = queue_manager.groups.get(group_id, {})
-        group_name = group_info.get('name', f'Group {group_id}')
+        group_name = queue_manager.get_group_view(group_id).name
         
         # Get personalized help text
         help_text = self.get_user_help_text(user_id, group_name)
@@ -5365,13 +5589,8 @@ class UniversityRegistrationBot:
         
         user_id = query.from_user.id
         
-        # Get current group info
-        group_info = queue_manager.groups.get(current_group_id, {})
-        group_name = group_info.get('name', f'Group {current_group_id}')
-        
-        # Get course count for this group
-        group_courses = queue_manager.get_group_courses(current_group_id)
-        course_count = len(group_courses)
+        # Get current group name and course count
+        group_view = queue_manager.get_group_view(current_group_id)
         
         # Check if user has admin permissions for this group
         is_admin = queue_manager.has_admin_access(user_id, current_group_id)
@@ -5389,13 +5608,14 @@ class UniversityRegistrationBot:
         
         message_text = (
             f"👤 **Ваша текущая группа:**\n\n"
-            f"📚 **Группа:** {group_name}\n"
-            f"📊 **Курсов доступно:** {course_count}\n"
+            f"📚 **Группа:** {group_view.name}\n"
+            f"📊 **Курсов доступно:** {group_view.course_count}\n"
             f"🔰 **Статус:** {admin_status}\n\n"
             f"**Выберите действие:**"
         )
         
-        await query.edit_message_text(
+        await self.edit_message_if_changed(
+            query,
             message_text,
             reply_markup=reply_markup,
             parse_mode='Markdown'
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Config duplicate-key check
+Reports JSON objects in config.json that repeat a key (the bot silently keeps the last value).
+Exits with status 1 if any are found, so it can run from CI or a pre-commit hook.
+
+Usage: python scripts/check_config_dupes.py [path/to/config.json]
+"""
+
+import sys
+import json
+
+
+def find_duplicate_keys(path: str) -> list[str]:
+    """Parse the file and return every key that appears more than once in the same object"""
+    duplicates = []
+
+    def collect(pairs):
+        seen = set()
+        for key, _ in pairs:
+            if key in seen:
+                duplicates.append(key)
+            seen.add(key)
+        return dict(pairs)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        json.load(f, object_pairs_hook=collect)
+    return duplicates
+
+
+def main() -> int:
+    path = sys.argv[1] if len(sys.argv) > 1 else 'config.json'
+    try:
+        duplicates = find_duplicate_keys(path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not read {path}: {e}")
+        return 1
+
+    if duplicates:
+        print(f"❌ Duplicate keys in {path}: {', '.join(duplicates)}")
+        print("Only the last value of each is used; remove the extra entries.")
+        return 1
+
+    print(f"✅ No duplicate keys in {path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())